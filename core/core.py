@@ -14,7 +14,7 @@ import threading
 import concurrent
 
 from sublime_db.libs import asyncio
-from .log import log_exception
+from .log import log_exception, log_info
 
 T = TypeVar('T')
 
@@ -14,6 +14,5 @@ def log_exception(*args) -> None:
 	print(traceback.format_exc())
 	
 def log_info(*args) -> None:
-	import traceback
-	if not should_log_exceptions: return
+	if not should_log_info: return
 	print(*args)
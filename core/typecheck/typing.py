@@ -23,6 +23,8 @@ class Dict(Generic):
     pass
 class Set(Generic):
     pass
+class FrozenSet(Generic):
+    pass
 class Sequence(Generic):
     pass
 class NamedTuple(Generic):
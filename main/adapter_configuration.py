@@ -24,11 +24,12 @@ class AdapterConfiguration:
 		def from_json(json: dict) -> 'AdapterConfiguration.Installation':
 			return AdapterConfiguration.Installation(json['name'], json['url'], json['format'])
 
-	def __init__(self, type: str, command: List[str], tcp_port: Optional[int], tcp_address: Optional[str], vscode_package_file: Optional[str], installation: Optional['AdapterConfiguration.Installation']) -> None:
+	def __init__(self, type: str, command: List[str], tcp_port: Optional[int], tcp_address: Optional[str], vscode_package_file: Optional[str], installation: Optional['AdapterConfiguration.Installation'], tcp_ready: Optional[str] = None) -> None:
 		self.type = type
 		self.command = command
 		self.tcp_port = tcp_port
 		self.tcp_address = tcp_address
+		self.tcp_ready = tcp_ready
 		self.vscode_package_file = vscode_package_file
 		self.snippets = [] #type: List[dict]
 		self.installation = installation
@@ -67,7 +68,8 @@ class AdapterConfiguration:
 			json.get('tcp_port'),
 			json.get('tcp_address'),
 			vscode_package_file,
-			installation
+			installation,
+			json.get('tcp_ready')
 		)
 
 @core.async
@@ -0,0 +1,169 @@
+'''
+	keeps debug adapter processes running before they are needed so launching doesn't have to wait for the adapter to start up (node, python, lldb...)
+
+	adapters are pooled by type and command, the first launch of an adapter starts one normally and fills the pool in the background
+	every launch after that takes an adapter from the pool and the pool is refilled in the background again
+
+	only adapters that talk over stdio are pooled, adapters started as a server all listen on the same tcp_port
+	adapters that sit in the pool for longer than adapter_pool_idle_timeout or use more than adapter_pool_max_memory are ended
+'''
+from sublime_db.core.typecheck import Optional, List, Dict, Tuple, Set, Any
+
+import time
+
+from sublime_db import core
+
+from .adapter_configuration import AdapterConfiguration
+from .util import get_setting
+from .debug_adapter_client.transport import (
+	Process,
+	Transport,
+	StdioTransport,
+	start_async_stdio_transport,
+	asyncio_pipes_supported
+)
+
+CHECK_INTERVAL = 30
+
+class PooledAdapter:
+	def __init__(self, adapter_configuration: AdapterConfiguration, process: Process, transport: Transport, stderr: List[str]) -> None:
+		self.adapter_configuration = adapter_configuration
+		self.process = process
+		self.transport = transport
+		# anything the adapter printed to stderr while it was waiting in the pool
+		self.stderr = stderr
+		self.created = time.time()
+
+	def dispose(self) -> None:
+		self.transport.dispose()
+		self.process.dispose()
+
+def _key(adapter_configuration: AdapterConfiguration) -> Tuple[str, Tuple[str, ...]]:
+	return (adapter_configuration.type, tuple(adapter_configuration.command))
+
+class AdapterPool:
+	shared = None #type: AdapterPool
+
+	def __init__(self) -> None:
+		self.adapters = {} #type: Dict[Tuple[str, Tuple[str, ...]], List[PooledAdapter]]
+		self.refilling = set() #type: Set[Tuple[str, Tuple[str, ...]]]
+		self.check_handle = None #type: Optional[Any]
+		self.disposed = False
+
+	def size(self) -> int:
+		return get_setting(None, 'adapter_pool_size', 0)
+
+	def acquire(self, adapter_configuration: AdapterConfiguration) -> Optional[PooledAdapter]:
+		'''
+			returns a running adapter for this configuration if there is one and starts refilling the pool
+			the caller owns the returned adapter and its on_stderr should be set to something that handles the output
+		'''
+		if self.disposed or adapter_configuration.tcp_port or self.size() <= 0:
+			return None
+
+		adapters = self.adapters.get(_key(adapter_configuration), [])
+		adapter = None
+		while adapters:
+			candidate = adapters.pop(0)
+			if candidate.process.process.poll() is None:
+				adapter = candidate
+				break
+			print('AdapterPool: pooled adapter {} exited'.format(adapter_configuration.type))
+			candidate.dispose()
+
+		self.refill(adapter_configuration)
+		return adapter
+
+	def refill(self, adapter_configuration: AdapterConfiguration) -> None:
+		key = _key(adapter_configuration)
+		if not key in self.refilling:
+			self.refilling.add(key)
+			core.run(self._refill(adapter_configuration))
+
+	@core.async
+	def _refill(self, adapter_configuration: AdapterConfiguration) -> core.awaitable[None]:
+		key = _key(adapter_configuration)
+		try:
+			while not self.disposed and len(self.adapters.get(key, [])) < self.size():
+				adapter = yield from self._start(adapter_configuration)
+				if self.disposed:
+					adapter.dispose()
+					return
+				self.adapters.setdefault(key, []).append(adapter)
+		except Exception:
+			core.log_exception()
+		finally:
+			self.refilling.discard(key)
+
+		self._schedule_check()
+
+	@core.async
+	def _start(self, adapter_configuration: AdapterConfiguration) -> core.awaitable[PooledAdapter]:
+		print('AdapterPool: starting adapter {}'.format(adapter_configuration.type))
+		use_asyncio_pipes = get_setting(None, 'asyncio_transports', True) and asyncio_pipes_supported()
+		stderr = [] #type: List[str]
+		process = Process(adapter_configuration.command,
+			on_stdout = None,
+			on_stderr = stderr.append,
+			use_asyncio = use_asyncio_pipes)
+
+		if use_asyncio_pipes:
+			try:
+				transport = yield from start_async_stdio_transport(process) #type: Transport
+			except:
+				process.dispose()
+				raise
+		else:
+			transport = StdioTransport(process)
+
+		return PooledAdapter(adapter_configuration, process, transport, stderr)
+
+	def _schedule_check(self) -> None:
+		if self.disposed or self.check_handle:
+			return
+		if any(self.adapters.values()):
+			self.check_handle = core.main_loop.call_later(CHECK_INTERVAL, self._check)
+
+	def _check(self) -> None:
+		self.check_handle = None
+		idle_timeout = get_setting(None, 'adapter_pool_idle_timeout', 600)
+		max_memory = get_setting(None, 'adapter_pool_max_memory', 0) * 1024 * 1024
+		now = time.time()
+
+		for key, adapters in self.adapters.items():
+			keep = [] #type: List[PooledAdapter]
+			replace = None #type: Optional[AdapterConfiguration]
+			for adapter in adapters:
+				memory = adapter.process.memory_usage()
+				if not adapter.process.process.poll() is None:
+					reason = 'exited'
+					replace = adapter.adapter_configuration
+				elif now - adapter.created > idle_timeout:
+					reason = 'idle for {:.0f}s'.format(now - adapter.created)
+				elif max_memory and memory and memory > max_memory:
+					reason = 'using {:.0f}MB'.format(memory / 1024 / 1024)
+					replace = adapter.adapter_configuration
+				else:
+					keep.append(adapter)
+					continue
+
+				print('AdapterPool: ending adapter {} ({})'.format(adapter.adapter_configuration.type, reason))
+				adapter.dispose()
+
+			self.adapters[key] = keep
+			# adapters that crashed or grew too large are replaced, ones that timed out are not since nothing has been launching them
+			if replace:
+				self.refill(replace)
+
+		self._schedule_check()
+
+	def dispose(self) -> None:
+		self.disposed = True
+		if self.check_handle:
+			self.check_handle.cancel()
+			self.check_handle = None
+
+		for adapters in self.adapters.values():
+			for adapter in adapters:
+				adapter.dispose()
+		self.adapters = {}
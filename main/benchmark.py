@@ -0,0 +1,533 @@
+'''
+	benchmarks that run a debugger session against a ReplayTransport instead of a debug adapter
+
+	each scenario is a synthetic recording that is played back through DebugAdapterClient, DebuggerState and the debugger panels of a window
+	run them with Debugger: Run Benchmarks, results are written to the console panel
+'''
+from sublime_db.core.typecheck import List, Optional, Callable, Tuple, TYPE_CHECKING
+
+import io
+import json
+import time
+import socket
+import threading
+
+from sublime_db import core, ui
+from sublime_db.libs import asyncio
+
+from .breakpoints import Breakpoints, Breakpoint
+from .configurations import Configuration
+from .adapter_configuration import AdapterConfiguration
+from .debugger import DebuggerState
+from .debug_adapter_client.replay import ReplayTransport
+from .debug_adapter_client.transport import MessageReader, decode_message
+from .debug_adapter_client.connect import connect_tcp_transport
+from .debug_adapter_client.trace import RECEIVED
+from .debug_adapter_client.types import Variable
+from .components.variable_component import VariableComponent
+from .components.console_panel import ConsolePanel
+
+if TYPE_CHECKING: from .main import Main
+
+SCENARIO_TIMEOUT = 60
+IDLE_TIME = 2
+
+class Recording:
+	'''
+		builds a recording in the same format as a dumped ProtocolTrace
+	'''
+	def __init__(self) -> None:
+		self.entries = [] #type: List[dict]
+		self.seq = 0
+		self.end_time = 0.0
+
+	def response(self, command: str, body: dict, latency_ms: float = 1.0) -> 'Recording':
+		self.seq += 1
+		self.entries.append({
+			'time_ms': 0,
+			'direction': RECEIVED,
+			'latency_ms': latency_ms,
+			'message': {
+				'seq': self.seq,
+				'type': 'response',
+				'request_seq': 0,
+				'command': command,
+				'success': True,
+				'body': body,
+			}
+		})
+		return self
+
+	def event(self, time_ms: float, event: str, body: dict) -> 'Recording':
+		self.seq += 1
+		self.end_time = max(self.end_time, time_ms)
+		self.entries.append({
+			'time_ms': time_ms,
+			'direction': RECEIVED,
+			'latency_ms': None,
+			'message': {
+				'seq': self.seq,
+				'type': 'event',
+				'event': event,
+				'body': body,
+			}
+		})
+		return self
+
+	def session(self) -> 'Recording':
+		self.response('initialize', {})
+		self.response('launch', {})
+		self.response('threads', {'threads': [{'id': 1, 'name': 'thread 1'}]})
+		self.response('setExceptionBreakpoints', {})
+		self.response('configurationDone', {})
+		self.response('disconnect', {})
+		self.event(50, 'initialized', {})
+		return self
+
+	def stopped_responses(self, threads: int = 1, frames: int = 20, variables: int = 20) -> 'Recording':
+		self.response('threads', {
+			'threads': [{'id': id, 'name': 'thread {}'.format(id)} for id in range(1, threads + 1)]
+		})
+		self.response('stackTrace', {
+			'stackFrames': [{'id': id, 'name': 'frame {}'.format(id), 'line': id} for id in range(1, frames + 1)],
+			'totalFrames': frames,
+		})
+		self.response('scopes', {
+			'scopes': [
+				{'name': 'Locals', 'variablesReference': 1, 'expensive': False},
+				{'name': 'Globals', 'variablesReference': 2, 'expensive': True},
+			]
+		})
+		self.response('variables', {
+			'variables': [{'name': 'variable_{}'.format(i), 'value': str(i), 'variablesReference': 0} for i in range(variables)]
+		})
+		return self
+
+	def terminated(self) -> List[dict]:
+		self.event(self.end_time + 200, 'terminated', {})
+		return self.entries
+
+def output_flood(count: int = 10000) -> List[dict]:
+	recording = Recording().session()
+	for i in range(count):
+		recording.event(100, 'output', {'category': 'stdout', 'output': 'output line {}\n'.format(i)})
+	return recording.terminated()
+
+def stop_storm(count: int = 200) -> List[dict]:
+	recording = Recording().session().stopped_responses()
+	for i in range(count):
+		recording.event(100 + i * 10, 'stopped', {'reason': 'step', 'threadId': 1, 'allThreadsStopped': True})
+		recording.event(105 + i * 10, 'continued', {'threadId': 1, 'allThreadsContinued': True})
+	recording.event(100 + count * 10, 'stopped', {'reason': 'breakpoint', 'threadId': 1, 'allThreadsStopped': True})
+	return recording.terminated()
+
+def huge_variables(count: int = 5000) -> List[dict]:
+	recording = Recording().session().stopped_responses(variables = count)
+	recording.event(100, 'stopped', {'reason': 'breakpoint', 'threadId': 1, 'allThreadsStopped': True})
+	recording.event(2000, 'output', {'category': 'console', 'output': 'done'})
+	return recording.terminated()
+
+def many_threads(count: int = 500) -> List[dict]:
+	recording = Recording().session().stopped_responses(threads = count)
+	for id in range(1, count + 1):
+		recording.event(100, 'thread', {'reason': 'started', 'threadId': id})
+	recording.event(200, 'stopped', {'reason': 'breakpoint', 'threadId': 1, 'allThreadsStopped': True})
+	recording.event(2000, 'output', {'category': 'console', 'output': 'done'})
+	return recording.terminated()
+
+SCENARIOS = [
+	('output flood', output_flood),
+	('stop storm', stop_storm),
+	('huge variable tree', huge_variables),
+	('many threads', many_threads),
+] #type: List[Tuple[str, Callable[[], List[dict]]]]
+
+class LoopLagProbe:
+	'''
+		measures how late the main loop runs a callback that should run every interval
+		this is the latency anything else on the main loop (clicks, rendering) sees
+	'''
+	def __init__(self, interval: float = 0.005) -> None:
+		self.interval = interval
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+		self.running = False
+
+	def start(self) -> None:
+		self.running = True
+		self._schedule()
+
+	def stop(self) -> None:
+		self.running = False
+
+	def _schedule(self) -> None:
+		self.expected = core.main_loop.time() + self.interval
+		core.main_loop.call_later(self.interval, self._tick)
+
+	def _tick(self) -> None:
+		if not self.running:
+			return
+		lag = max(core.main_loop.time() - self.expected, 0)
+		self.count += 1
+		self.total += lag
+		self.max = max(self.max, lag)
+		self._schedule()
+
+	def stats(self) -> str:
+		average = self.total / self.count if self.count else 0
+		return 'main loop lag {:.1f}ms average {:.1f}ms max'.format(average * 1000, self.max * 1000)
+
+@core.async
+def run_scenario(main: 'Main', name: str, entries: List[dict]) -> core.awaitable[str]:
+	debugger = main.debugger
+	breakpoints = Breakpoints()
+	transport = ReplayTransport(entries)
+	probe = LoopLagProbe()
+	probe.start()
+	start_time = time.perf_counter()
+	try:
+		yield from debugger.launch(AdapterConfiguration('replay', [], None, None, None, None), Configuration(name, 'replay', 'launch', {}), breakpoints, transport)
+		client = debugger.adapter
+		if not client:
+			return '{}: failed to start'.format(name)
+
+		yield from asyncio.wait_for(transport.finished, SCENARIO_TIMEOUT, loop = core.main_loop)
+		while debugger.state != DebuggerState.stopped and time.perf_counter() - start_time < SCENARIO_TIMEOUT:
+			yield from asyncio.sleep(0.01, loop = core.main_loop)
+
+		elapsed = time.perf_counter() - start_time
+		return '{}: {} messages in {:.2f}s ({:.0f} messages/s), {}, {}'.format(
+			name,
+			client.messages_handled,
+			elapsed,
+			client.messages_handled / elapsed,
+			client.message_handling_stats(),
+			probe.stats()
+		)
+	finally:
+		probe.stop()
+		debugger.force_stop_adapter()
+		breakpoints.dispose()
+
+def frame_messages(entries: List[dict]) -> Tuple[bytes, int]:
+	'''
+		the received messages of a recording as the debug adapter would have sent them
+	'''
+	data = io.BytesIO()
+	count = 0
+	for entry in entries:
+		message = entry.get('message')
+		if not message or entry['direction'] != RECEIVED:
+			continue
+		content = json.dumps(message).encode('UTF-8')
+		data.write('Content-Length: {}\r\n\r\n'.format(len(content)).encode('UTF-8'))
+		data.write(content)
+		count += 1
+	return data.getvalue(), count
+
+def benchmark_framing(entries: List[dict], read_size: int) -> str:
+	'''
+		reads the framed messages of a recording through MessageReader and decodes them
+	'''
+	framed, count = frame_messages(entries)
+	size = len(framed)
+	data = io.BytesIO(framed)
+	reader = MessageReader(read_size)
+	decoded = 0
+	start_time = time.perf_counter()
+	# read in read_size chunks like a socket would hand them to us
+	while reader.read_into(lambda view: data.readinto(view[:read_size])):
+		for message in reader.messages():
+			if decode_message(message, None):
+				decoded += 1
+	elapsed = time.perf_counter() - start_time
+	assert decoded == count, 'expected every message to be decoded'
+	return 'framing ({} byte reads): {} messages {:.1f}MB in {:.3f}s ({:.1f}MB/s)'.format(read_size, decoded, size / 1000000, elapsed, size / 1000000 / elapsed)
+
+@core.async
+def benchmark_transport(entries: List[dict], use_asyncio: bool) -> core.awaitable[str]:
+	'''
+		sends the messages of a recording over a loopback socket and times how long the transport takes to hand all of them to the main loop
+		and how much main loop time went into decoding them
+	'''
+	data, count = frame_messages(entries)
+	server = socket.socket()
+	server.bind(('127.0.0.1', 0))
+	server.listen(1)
+	port = server.getsockname()[1]
+
+	def serve() -> None:
+		connection, _ = server.accept()
+		connection.sendall(data)
+		connection.close()
+		server.close()
+	threading.Thread(target = serve).start()
+
+	transport = yield from connect_tcp_transport('127.0.0.1', port, use_asyncio = use_asyncio)
+
+	received = [0]
+	def on_receive(messages: List[dict]) -> None:
+		received[0] += len(messages)
+
+	closed = core.main_loop.create_future()
+	probe = LoopLagProbe()
+	probe.start()
+	threads = threading.active_count()
+	start_time = time.perf_counter()
+	transport.start(on_receive, lambda: closed.set_result(None))
+	transport_threads = threading.active_count() - threads
+	try:
+		yield from asyncio.wait_for(closed, SCENARIO_TIMEOUT, loop = core.main_loop)
+	finally:
+		probe.stop()
+		transport.dispose()
+
+	elapsed = time.perf_counter() - start_time
+	assert received[0] == count, 'expected every message to be received'
+	return '{} transport: {} messages {:.1f}MB in {:.3f}s ({:.0f} messages/s), {} threads, {:.1f}us main loop decode per message, {}, {}'.format(
+		'asyncio' if use_asyncio else 'threaded',
+		count,
+		len(data) / 1000000,
+		elapsed,
+		count / elapsed,
+		transport_threads,
+		transport.decode_time / count * 1000000,
+		transport.io_stats(),
+		probe.stats()
+	)
+
+def benchmark_breakpoints(count: int = 10000, files: int = 1000) -> str:
+	'''
+		adds count breakpoints spread across files and times the lookups done while editing and toggling breakpoints
+	'''
+	breakpoints = Breakpoints()
+	try:
+		per_file = count // files
+		created = [Breakpoint('/benchmark/file_{}.py'.format(i % files), (i // files) * 7 + 1, True) for i in range(files * per_file)]
+
+		start_time = time.perf_counter()
+		for breakpoint in created:
+			breakpoints.add(breakpoint)
+		add_time = time.perf_counter() - start_time
+
+		start_time = time.perf_counter()
+		for breakpoint in created:
+			assert breakpoints.get_breakpoint(breakpoint.file, breakpoint.line) is breakpoint
+			assert breakpoints.get_breakpoint(breakpoint.file, breakpoint.line + 1) is None
+		lookup_time = time.perf_counter() - start_time
+
+		start_time = time.perf_counter()
+		for i in range(files):
+			assert len(breakpoints.breakpoints_for_file('/benchmark/file_{}.py'.format(i))) == per_file
+		for_file_time = time.perf_counter() - start_time
+
+		start_time = time.perf_counter()
+		ordered = breakpoints.breakpoints
+		iterate_time = time.perf_counter() - start_time
+		assert len(ordered) == len(created)
+		for a, b in zip(ordered, ordered[1:]):
+			assert (a.file, a.line) <= (b.file, b.line), 'expected breakpoints in file and line order'
+
+		start_time = time.perf_counter()
+		for breakpoint in created:
+			breakpoints.remove_breakpoint(breakpoint)
+		remove_time = time.perf_counter() - start_time
+		assert not breakpoints.breakpoints
+
+		return 'breakpoints ({} across {} files): add {:.0f}ms, {} lookups {:.0f}ms, breakpoints_for_file {:.0f}ms, ordered iteration {:.1f}ms, remove {:.0f}ms'.format(
+			len(created),
+			files,
+			add_time * 1000,
+			len(created) * 2,
+			lookup_time * 1000,
+			for_file_time * 1000,
+			iterate_time * 1000,
+			remove_time * 1000
+		)
+	finally:
+		breakpoints.dispose()
+
+def benchmark_variable_tree(containers: int = 50, children: int = 100) -> str:
+	'''
+		expands a tree of containers * children variables (already fetched so no debug adapter is needed) and times rendering it
+		then adds a container like load more does and collapses one, the other containers should keep their components
+	'''
+	def container(index: int) -> Variable:
+		return Variable(None, 'container_{}'.format(index), str(index), index + 1)
+
+	root = VariableComponent(Variable(None, 'root', '', 1))
+	root.variable.fetched = True
+	root.variable.variables = [container(i) for i in range(containers)]
+	layout = ui.Layout(root)
+
+	def fetched(component: VariableComponent) -> None:
+		component.variable.fetched = True
+		component.variable.variables = [Variable(None, 'variable_{}'.format(i), str(i), 0) for i in range(children)]
+
+	def components() -> List[VariableComponent]:
+		table = root.render_items[2]
+		return [item.render_items[0] for item in table.render_items]
+
+	try:
+		start_time = time.perf_counter()
+		root.variable.expand()
+		layout.render()
+		for component in components():
+			fetched(component)
+			component.variable.expand()
+		layout.render()
+		expand_time = time.perf_counter() - start_time
+		nodes = containers * (children + 1)
+
+		before = components()
+		start_time = time.perf_counter()
+		root.variable.variables.append(container(containers))
+		root.dirty()
+		layout.render()
+		append_time = time.perf_counter() - start_time
+		after = components()
+		kept = sum(1 for a, b in zip(before, after) if a is b and b.variable.expanded)
+		assert kept == containers, 'expected every expanded container to be kept'
+
+		start_time = time.perf_counter()
+		after[0].variable.collapse()
+		layout.render()
+		collapse_time = time.perf_counter() - start_time
+
+		return 'variable tree ({} nodes): expand {:.0f}ms, append a container {:.1f}ms ({} of {} expanded containers kept), collapse one {:.1f}ms'.format(
+			nodes,
+			expand_time * 1000,
+			append_time * 1000,
+			kept,
+			containers,
+			collapse_time * 1000
+		)
+	finally:
+		layout.dispose()
+
+def benchmark_console(count: int = 100) -> str:
+	'''
+		adds lines to a console panel (it shows the newest line first) and counts the components whose html is generated again
+		only the new row and the components containing the rows should be, not every row that moved down
+	'''
+	def components(component: ui.Component) -> int:
+		return 1 + sum(components(item) for item in component.render_items)
+
+	console = ConsolePanel(lambda: None)
+	for i in range(50):
+		console.Add('line {}'.format(i))
+	layout = ui.Layout(console)
+	try:
+		layout.render()
+		total = components(console)
+
+		regenerated = 0
+		most_regenerated = 0
+		start_time = time.perf_counter()
+		for i in range(count):
+			console.Add('append {}'.format(i))
+			layout.render()
+			regenerated += layout.regenerated
+			most_regenerated = max(most_regenerated, layout.regenerated)
+		append_time = time.perf_counter() - start_time
+		rows = len(console.render_items[1].render_items[1].render_items)
+		assert most_regenerated < rows, 'expected appending a line to only generate the new row again'
+
+		# a row that moved down should still be attached to the layout and only it and its containers generated again
+		row = console.items[-10]
+		assert row.layout is layout, 'expected rows that moved to still be attached'
+		row.dirty()
+		layout.render()
+
+		return 'console ({} components): append a line {:.2f}ms, {:.1f} average and {} most components generated per append, {} to change an older row'.format(
+			total,
+			append_time / count * 1000,
+			regenerated / count,
+			most_regenerated,
+			layout.regenerated
+		)
+	finally:
+		layout.dispose()
+
+@core.async
+def benchmark_render(main: 'Main', count: int = 20) -> core.awaitable[str]:
+	'''
+		measures how many frames and how much cpu the ui uses while nothing changes and how long a change takes to be handed to sublime
+		then dirties the console without changing it, those frames should be skipped instead of painted
+	'''
+	# let anything that is still dirty render first
+	yield from asyncio.sleep(0.5, loop = core.main_loop)
+
+	ui.render_stats.reset()
+	cpu_time = time.process_time()
+	yield from asyncio.sleep(IDLE_TIME, loop = core.main_loop)
+	idle_cpu = time.process_time() - cpu_time
+	idle_frames = ui.render_stats.frames
+
+	ui.render_stats.reset()
+	for i in range(count):
+		painted = ui.render_stats.painted
+		main.console_panel.Add('repaint {}'.format(i))
+		start_time = time.perf_counter()
+		while ui.render_stats.painted == painted and time.perf_counter() - start_time < SCENARIO_TIMEOUT:
+			yield from asyncio.sleep(0.001, loop = core.main_loop)
+
+	for i in range(count):
+		frames = ui.render_stats.frames
+		main.console_panel.dirty()
+		start_time = time.perf_counter()
+		while ui.render_stats.frames == frames and time.perf_counter() - start_time < SCENARIO_TIMEOUT:
+			yield from asyncio.sleep(0.001, loop = core.main_loop)
+
+	return 'render: {} frames and {:.0f}ms cpu while idle for {}s, {} repaints and {} unchanged: {}'.format(idle_frames, idle_cpu * 1000, IDLE_TIME, count, count, ui.render_stats)
+
+@core.async
+def run_benchmarks(main: 'Main') -> core.awaitable[None]:
+	if main.debugger.state != DebuggerState.stopped:
+		core.display('Stop debugging before running the benchmarks')
+		return
+
+	main.console_panel.clear()
+	main.console_panel.Add('Running benchmarks...')
+
+	result = benchmark_breakpoints()
+	print('Benchmark:', result)
+	main.console_panel.Add(result)
+
+	result = yield from benchmark_render(main)
+	print('Benchmark:', result)
+	main.console_panel.Add(result)
+
+	result = benchmark_variable_tree()
+	print('Benchmark:', result)
+	main.console_panel.Add(result)
+
+	result = benchmark_console()
+	print('Benchmark:', result)
+	main.console_panel.Add(result)
+
+	entries = huge_variables(50000)
+	for read_size in (4096, 65536):
+		result = benchmark_framing(entries, read_size)
+		print('Benchmark:', result)
+		main.console_panel.Add(result)
+
+	flood = output_flood()
+	for use_asyncio in (False, True):
+		try:
+			result = yield from benchmark_transport(flood, use_asyncio)
+		except Exception as e:
+			core.log_exception()
+			result = 'transport failed {}'.format(e)
+		print('Benchmark:', result)
+		main.console_panel.Add(result)
+
+	for name, scenario in SCENARIOS:
+		try:
+			result = yield from run_scenario(main, name, scenario())
+		except Exception as e:
+			core.log_exception()
+			result = '{}: failed {}'.format(name, e)
+		print('Benchmark:', result)
+		main.console_panel.Add(result)
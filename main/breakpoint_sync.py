@@ -0,0 +1,156 @@
+'''
+	keeps the breakpoints a debug adapter knows about in sync with Breakpoints
+
+	we remember what the adapter acknowledged for each file (and the exception filters) and only send a file again when its effective breakpoints changed
+	effective means what ends up in the setBreakpoints request: the line, condition, log message and hit count of each enabled breakpoint
+
+	changes are collected and sent together, breakpoints that moved because a file is being edited wait until the edits stop for MOVED_DELAY
+	those two are scheduled separately so edits in one file don't hold back a breakpoint toggled in another and a toggle doesn't send edits early
+	a file is never sent again while a request for it is still in flight so responses can't arrive out of order
+'''
+from sublime_db.core.typecheck import Tuple, List, Optional, Dict, Set, Any
+
+from sublime_db import core
+from sublime_db.libs import asyncio
+
+from .breakpoints import Breakpoints, Breakpoint
+from .debug_adapter_client.client import DebugAdapterClient
+
+# seconds to wait after the last edit that moved breakpoints before sending them
+MOVED_DELAY = 0.5
+
+def effective_breakpoints(breakpoints: List[Breakpoint]) -> Tuple[Tuple[int, Optional[str], Optional[str], Optional[str]], ...]:
+	return tuple((b.line, b.condition, b.log, b.count) for b in breakpoints if b.enabled)
+
+class BreakpointSync:
+	def __init__(self, client: DebugAdapterClient, breakpoints: Breakpoints) -> None:
+		self.client = client
+		self.breakpoints = breakpoints
+		client.breakpoints = breakpoints
+
+		self.acknowledged = {} #type: Dict[str, Tuple[Any, ...]]
+		self.acknowledged_filters = None #type: Optional[Tuple[str, ...]]
+		# files to send on the next flush and files waiting for the edits that moved their breakpoints to stop
+		self.dirty = set() #type: Set[str]
+		self.moved = set() #type: Set[str]
+		self.filters_dirty = False
+		self.in_flight = set() #type: Set[str]
+
+		# nothing is sent until the adapter is ready for configuration see initial_sync
+		self.ready = False
+		self.handle = None #type: Optional[Any]
+		self.moved_handle = None #type: Optional[Any]
+
+		self.requests_sent = 0
+		self.requests_skipped = 0
+
+	@core.async
+	def initial_sync(self) -> core.awaitable[None]:
+		'''
+			sends the breakpoints of every file and the exception filters, call this once the adapter sends the initialized event
+		'''
+		for breakpoint in self.breakpoints.breakpoints:
+			self.dirty.add(breakpoint.file)
+		self.filters_dirty = True
+		yield from self._flush()
+
+		self.ready = True
+		if self.dirty:
+			self._schedule()
+		if self.moved:
+			self._schedule_moved(MOVED_DELAY)
+
+	def changed(self, file: str, delay: float = 0) -> None:
+		if delay:
+			self.moved.add(file)
+			self._schedule_moved(delay)
+		else:
+			# sending the file sends its moved breakpoints too
+			self.moved.discard(file)
+			self.dirty.add(file)
+			self._schedule()
+
+	def filters_changed(self) -> None:
+		self.filters_dirty = True
+		self._schedule()
+
+	def _schedule(self) -> None:
+		if not self.ready or self.handle:
+			return
+		self.handle = core.main_loop.call_soon(self._on_flush)
+
+	def _schedule_moved(self, delay: float) -> None:
+		if not self.ready:
+			return
+		# the latest edit decides when we send so edits keep pushing moved breakpoints back
+		if self.moved_handle:
+			self.moved_handle.cancel()
+		self.moved_handle = core.main_loop.call_later(delay, self._on_moved)
+
+	def _on_flush(self) -> None:
+		self.handle = None
+		core.run(self._flush())
+
+	def _on_moved(self) -> None:
+		self.moved_handle = None
+		self.dirty.update(self.moved)
+		self.moved.clear()
+		core.run(self._flush())
+
+	@core.async
+	def _flush(self) -> core.awaitable[None]:
+		requests = [] #type: List[core.awaitable[None]]
+
+		if self.filters_dirty:
+			self.filters_dirty = False
+			filters = tuple(filter.id for filter in self.breakpoints.filters if filter.enabled)
+			if filters != self.acknowledged_filters:
+				requests.append(self._send_filters(filters))
+
+		# files that are in flight stay dirty and are flushed again when their request finishes
+		for file in self.dirty - self.in_flight:
+			self.dirty.discard(file)
+			breakpoints = self.breakpoints.breakpoints_for_file(file)
+			effective = effective_breakpoints(breakpoints)
+			if self.acknowledged.get(file, ()) == effective:
+				self.requests_skipped += 1
+				continue
+			self.in_flight.add(file)
+			requests.append(self._send_file(file, breakpoints, effective))
+
+		if requests:
+			yield from asyncio.wait(requests, loop = core.main_loop)
+
+	@core.async
+	def _send_file(self, file: str, breakpoints: List[Breakpoint], effective: Tuple[Any, ...]) -> core.awaitable[None]:
+		self.requests_sent += 1
+		try:
+			yield from self.client.SetBreakpointsFile(file, breakpoints)
+			self.acknowledged[file] = effective
+		except Exception as e:
+			# we no longer know what the adapter has for this file so the next change always sends it
+			self.acknowledged.pop(file, None)
+			print('BreakpointSync: failed to set breakpoints for {}: {}'.format(file, e))
+		finally:
+			self.in_flight.discard(file)
+			if file in self.dirty:
+				self._schedule()
+
+	@core.async
+	def _send_filters(self, filters: Tuple[str, ...]) -> core.awaitable[None]:
+		self.requests_sent += 1
+		try:
+			yield from self.client.setExceptionBreakpoints(self.breakpoints.filters)
+			self.acknowledged_filters = filters
+		except Exception as e:
+			self.acknowledged_filters = None
+			print('BreakpointSync: failed to set exception breakpoints: {}'.format(e))
+
+	def dispose(self) -> None:
+		if self.handle:
+			self.handle.cancel()
+			self.handle = None
+		if self.moved_handle:
+			self.moved_handle.cancel()
+			self.moved_handle = None
+		print('BreakpointSync: {} requests sent, {} skipped because nothing changed'.format(self.requests_sent, self.requests_skipped))
@@ -1,7 +1,9 @@
 
-from sublime_db.core.typecheck import Tuple, List, Optional, Any
+from sublime_db.core.typecheck import Tuple, List, Optional, Dict, Any
 
 import sublime
+import bisect
+
 from sublime_db import ui, core
 
 class Filter:
@@ -25,15 +27,14 @@ class Breakpoint:
 		self.id = Breakpoint._next_id
 		Breakpoint._next_id += 1
 
-		self.regionName = 'bp{}'.format(self.id)
 		self._file = file
 		self._line = line
 		self._enabled = enabled
 		self._condition = None #type: Optional[str]
 		self._log = None #type: Optional[str]
 		self._count = None #type: Optional[str]
-		self.views = [] #type: List[sublime.View]
-		self._result = None #type: Optional[BreakpointResult]
+		# the result from each debug adapter (DebugAdapterClient) the breakpoint was sent to, there is one per session
+		self._results = {} #type: Dict[Any, BreakpointResult]
 
 	@property
 	def file(self):
@@ -54,10 +55,11 @@ class Breakpoint:
 	def line(self) -> int:
 		return self._line
 
+	# verified if any session verified it, an adapter that doesn't handle this kind of file shouldn't hide that another one does
 	@property
 	def verified(self):
-		if self._result:
-			return self._result.verified
+		if self._results:
+			return any(result.verified for result in self._results.values())
 		return True
 
 	def into_json (self) -> dict:
@@ -92,46 +94,151 @@ class Breakpoint:
 			return ui.Images.shared.dot_expr
 		return ui.Images.shared.dot
 
-	def update_views(self) -> None:
-		for view in self.views:
-			self.refresh_view(view)
-
-	def refresh_view(self, view: sublime.View) -> None:
-		regions = view.get_regions(self.regionName)
-		p = view.text_point(self.line - 1, 0)
-
-		if regions:
-			if regions[0].a == p and regions[0].b == p:
+class FileBreakpoints:
+	'''
+		the breakpoints of one file sorted by line with a parallel list of their lines to bisect
+		breakpoints on the same line are kept in the order they were added
+	'''
+	def __init__(self) -> None:
+		self.breakpoints = [] #type: List[Breakpoint]
+		self.lines = [] #type: List[int]
+
+	def add(self, breakpoint: Breakpoint) -> None:
+		index = bisect.bisect_right(self.lines, breakpoint.line)
+		self.lines.insert(index, breakpoint.line)
+		self.breakpoints.insert(index, breakpoint)
+
+	def remove(self, breakpoint: Breakpoint) -> None:
+		index = bisect.bisect_left(self.lines, breakpoint.line)
+		while index < len(self.breakpoints):
+			if self.breakpoints[index] is breakpoint:
+				del self.lines[index]
+				del self.breakpoints[index]
 				return
+			index += 1
+		raise ValueError('breakpoint is not in this file')
 
-		image = self.image().file
-		view.add_regions(self.regionName, [sublime.Region(p, p)], scope ='type', icon=image, flags=sublime.HIDDEN)
+	def get(self, line: int) -> Optional[Breakpoint]:
+		index = bisect.bisect_left(self.lines, line)
+		if index < len(self.lines) and self.lines[index] == line:
+			return self.breakpoints[index]
+		return None
 
-	def add_to_view(self, view: sublime.View) -> None:
-		for old_view in self.views:
-			if old_view.id == view.id:
-				self.refresh_view(view)
-				return
-				
-		self.views.append(view)
-		self.refresh_view(view)
+	# call this after the lines of some breakpoints changed
+	def resort(self) -> None:
+		self.breakpoints.sort(key = lambda b: b.line)
+		self.lines = [b.line for b in self.breakpoints]
+
+class BreakpointGutter:
+	'''
+		draws the breakpoints of a file in the gutter of one view
+		breakpoints are grouped by image into one region key each so drawing takes one add_regions call per kind of breakpoint instead of one per breakpoint
+		a kind is only drawn again when its breakpoints or their lines changed
+
+		the regions move with the text when the view is edited, reconcile reads them back with one get_regions call per kind
+		and only asks for the line of regions that actually moved
+	'''
+	def __init__(self, view: sublime.View) -> None:
+		self.view = view
+		self.file = view.file_name()
+		# region key -> the breakpoints drawn under that key sorted by line which is the order sublime returns the regions in
+		self.drawn = {} #type: Dict[str, List[Breakpoint]]
+		# region key -> the lines and text points of those breakpoints when they were drawn or last reconciled
+		self.lines = {} #type: Dict[str, List[int]]
+		self.points = {} #type: Dict[str, List[int]]
+		self.change_count = -1
+
+	def render(self, breakpoints: List[Breakpoint]) -> None:
+		# region key -> image, breakpoints
+		kinds = {} #type: Dict[str, Tuple[str, List[Breakpoint]]]
+		for breakpoint in breakpoints:
+			image = breakpoint.image().file
+			kinds.setdefault('bp:' + image, (image, []))[1].append(breakpoint)
+
+		for key in list(self.drawn.keys()):
+			if not key in kinds:
+				self.view.erase_regions(key)
+				self._forget(key)
+
+		known = None #type: Optional[Dict[int, int]]
+		for key, (image, kind) in kinds.items():
+			lines = [breakpoint.line for breakpoint in kind]
+			if self.drawn.get(key) == kind and self.lines.get(key) == lines:
+				continue
 
-	def clear_views(self) -> None:
-		for view in self.views:
-			view.erase_regions(self.regionName)
-		self.views = []
+			# the points we already know are still right if the view hasn't changed since so only new lines need a text_point call
+			if known is None:
+				known = {}
+				change_count = self.view.change_count()
+				if change_count == self.change_count:
+					for drawn_key in self.drawn:
+						known.update(zip(self.lines[drawn_key], self.points[drawn_key]))
+				self.change_count = change_count
+
+			points = [] #type: List[int]
+			for line in lines:
+				point = known.get(line)
+				if point is None:
+					point = self.view.text_point(line - 1, 0)
+					known[line] = point
+				points.append(point)
+
+			self.view.add_regions(key, [sublime.Region(point, point) for point in points], scope = 'type', icon = image, flags = sublime.HIDDEN)
+			self.drawn[key] = kind
+			self.lines[key] = lines
+			self.points[key] = points
+
+	def reconcile(self) -> Tuple[List[Tuple[Breakpoint, int]], bool]:
+		'''
+			returns the breakpoints whose regions are now on a different line with that line
+			and if any regions went missing, those kinds are forgotten so the next render draws them again
+		'''
+		moved = [] #type: List[Tuple[Breakpoint, int]]
+		missing = False
+		for key, breakpoints in list(self.drawn.items()):
+			regions = self.view.get_regions(key)
+			if len(regions) != len(breakpoints):
+				missing = True
+				self._forget(key)
+				continue
 
-	def __lt__(self, other: 'Breakpoint'):
-		if self.file.__lt__(other.file):
-			return True
-		return self.line.__lt__(other.line)
+			lines = self.lines[key]
+			points = self.points[key]
+			for index, region in enumerate(regions):
+				if region.a == points[index]:
+					continue
+				points[index] = region.a
+				line = self.view.rowcol(region.a)[0] + 1
+				if line != lines[index]:
+					lines[index] = line
+					moved.append((breakpoints[index], line))
+
+		self.change_count = self.view.change_count()
+		return moved, missing
+
+	def _forget(self, key: str) -> None:
+		del self.drawn[key]
+		del self.lines[key]
+		del self.points[key]
+
+	def clear(self) -> None:
+		for key in self.drawn.keys():
+			self.view.erase_regions(key)
+		self.drawn = {}
+		self.lines = {}
+		self.points = {}
 
 class Breakpoints:
 	def __init__(self) -> None:
-		self.breakpoints = [] #type: List[Breakpoint]
+		# breakpoints indexed by file, see the breakpoints property for every breakpoint in order
+		self.files = {} #type: Dict[str, FileBreakpoints]
+		self.sorted_files = None #type: Optional[List[str]]
 		self.filters = [] #type: List[Filter]
+		# view id -> the gutter of a view that shows a file we have seen breakpoints for
+		self.gutters = {} #type: Dict[int, BreakpointGutter]
 
-		self.onMovedBreakpoints = core.Event() #type: core.Event[Tuple[()]]
+		# posted with the file when editing it moved some of its breakpoints to other lines
+		self.onMovedBreakpoints = core.Event() #type: core.Event[str]
 		self.onChangedBreakpoint = core.Event() #type: core.Event[Breakpoint]
 		self.onResultBreakpoint = core.Event() #type: core.Event[Breakpoint]
 		self.onRemovedBreakpoint = core.Event() #type: core.Event[Breakpoint]
@@ -143,7 +250,7 @@ class Breakpoints:
 		self.selected_breakpoint = None #type: Optional[Breakpoint]
 
 		def update_views(breakpoint: Breakpoint) -> None:
-			breakpoint.update_views()
+			self.refresh_file(breakpoint.file)
 
 		self.onChangedBreakpoint.add(update_views)
 		self.onResultBreakpoint.add(update_views)
@@ -154,11 +261,24 @@ class Breakpoints:
 			ui.view_modified.add(self.view_modified)
 		] #type: List[Any]
 
+	@property
+	def breakpoints(self) -> List[Breakpoint]:
+		'''
+			every breakpoint sorted by file and then line
+		'''
+		if self.sorted_files is None:
+			self.sorted_files = sorted(self.files)
+		breakpoints = [] #type: List[Breakpoint]
+		for file in self.sorted_files:
+			breakpoints.extend(self.files[file].breakpoints)
+		return breakpoints
+
 	def dispose(self) -> None:
 		for d in self.disposeables:
 			d.dispose()
-		for bp in self.breakpoints:
-			bp.clear_views()
+		for gutter in self.gutters.values():
+			gutter.clear()
+		self.gutters = {}
 		
 	def toggle_filter(self, filter: Filter) -> None:
 		filter.enabled = not filter.enabled
@@ -178,33 +298,37 @@ class Breakpoints:
 		self.onSelectedBreakpoint.post(breakpoint)
 		 		
 	def remove_breakpoint(self, b: Breakpoint) -> None:
-		b.clear_views()
-		self.breakpoints.remove(b)
+		file_breakpoints = self.files[b.file]
+		file_breakpoints.remove(b)
+		if not file_breakpoints.breakpoints:
+			del self.files[b.file]
+			self.sorted_files = None
 		self.onChangedBreakpoint.post(b)
 		self.onRemovedBreakpoint.post(b)
 
 	def breakpoints_for_file(self, file: str) -> List[Breakpoint]:
-		r = []
-		for b in self.breakpoints:
-			if b.file == file:
-				r.append (b)
-		return r
+		file_breakpoints = self.files.get(file)
+		if not file_breakpoints:
+			return []
+		return list(file_breakpoints.breakpoints)
 
 	def get_breakpoint(self, file: str, line: int) -> Optional[Breakpoint]:
-		for b in self.breakpoints:
-			if b.file != file:
-				continue
-			if b.line == line:
-				return b
-		return None
+		file_breakpoints = self.files.get(file)
+		if not file_breakpoints:
+			return None
+		return file_breakpoints.get(line)
 
 	def add_breakpoint(self, file: str, line: int):
 		b = Breakpoint(file, line, True)
 		self.add(b)
 
 	def add(self, breakpoint: Breakpoint):
-		self.breakpoints.append(breakpoint)
-		self.breakpoints.sort()
+		file_breakpoints = self.files.get(breakpoint.file)
+		if not file_breakpoints:
+			file_breakpoints = FileBreakpoints()
+			self.files[breakpoint.file] = file_breakpoints
+			self.sorted_files = None
+		file_breakpoints.add(breakpoint)
 		self.onChangedBreakpoint.post(breakpoint)
 		self.onAddedBreakpoint.post(breakpoint)
 		view = sublime.active_window().active_view()
@@ -227,17 +351,46 @@ class Breakpoints:
 		breakpoint._count = count
 		self.onChangedBreakpoint.post(breakpoint)
 
-	def set_breakpoint_result(self, breakpoint: Breakpoint, result: BreakpointResult) -> None:
-		breakpoint._result = result
+	def set_breakpoint_result(self, breakpoint: Breakpoint, result: BreakpointResult, session: Any) -> None:
+		breakpoint._results[session] = result
 		self.onResultBreakpoint.post(breakpoint)
 
-	def clear_breakpoint_results(self) -> None:
+	# clears the results from one session or from every session if session is None
+	def clear_breakpoint_results(self, session: Any = None) -> None:
 		for breakpoint in self.breakpoints:
-			breakpoint._result = None
-			self.onResultBreakpoint.post(breakpoint)
+			if session is None:
+				changed = bool(breakpoint._results)
+				breakpoint._results = {}
+			else:
+				changed = not breakpoint._results.pop(session, None) is None
+			if changed:
+				self.onResultBreakpoint.post(breakpoint)
+
+	def _gutter(self, view: sublime.View) -> Optional[BreakpointGutter]:
+		file = view.file_name()
+		if not file:
+			return None
+		gutter = self.gutters.get(view.id())
+		if gutter and gutter.file != file:
+			gutter.clear()
+			gutter = None
+		if not gutter:
+			gutter = BreakpointGutter(view)
+			self.gutters[view.id()] = gutter
+		return gutter
+
+	def _render(self, gutter: BreakpointGutter) -> None:
+		file_breakpoints = self.files.get(gutter.file)
+		gutter.render(file_breakpoints.breakpoints if file_breakpoints else [])
+
+	# redraws the breakpoints of this file in every view that shows it
+	def refresh_file(self, file: str) -> None:
+		for id, gutter in list(self.gutters.items()):
+			if not gutter.view.is_valid():
+				del self.gutters[id]
+			elif gutter.file == file:
+				self._render(gutter)
 
-	def add_breakpoint_to_view(self, view: sublime.View, b: Breakpoint) -> None:
-		b.add_to_view(view)
 	def view_modified(self, view: sublime.View):
 		self.sync(view) 
 	def on_view_activated(self, view: sublime.View):
@@ -249,33 +402,31 @@ class Breakpoints:
 	# adds any breakpoints found in the data model that are not found on the view
 	def sync(self, view: sublime.View) -> None:
 		file = view.file_name()
-		print('Breakpoints: sync view ', file)
-		dirty = False
-		for b in self.breakpoints:
-			if b.file != file:
-				continue
-			identifier = b.regionName
-			regions = view.get_regions(identifier)
-			if len(regions) == 0: 
-				print('Error: Failed to find breakpoint that should be set, re-adding')
-				self.add_breakpoint_to_view(view, b)
-				dirty = True
-			else:
-				dirty = True
-				line = view.rowcol(regions[0].a)[0] + 1
-				if line != b.line:
-					dirty = True
-					b._line = line
-		if dirty:
-			self.onMovedBreakpoints.post(())
+		file_breakpoints = self.files.get(file)
+		if not file_breakpoints:
+			return
+		gutter = self.gutters.get(view.id())
+		if not gutter or gutter.file != file:
+			self.sync_from_breakpoints(view)
+			return
+
+		moved, missing = gutter.reconcile()
+		for b, line in moved:
+			b._line = line
+		if missing:
+			print('Error: Failed to find breakpoints that should be set, re-adding')
+		if moved:
+			file_breakpoints.resort()
+		if moved or missing:
+			self.refresh_file(file)
+		if moved:
+			self.onMovedBreakpoints.post(file)
 
 	# moves the view regions to match up with the data model
 	def sync_from_breakpoints(self, view: sublime.View) -> None:
-		file = view.file_name()
-		for breakpoint in self.breakpoints:
-			if breakpoint.file != file:
-				continue
-			breakpoint.add_to_view(view)
+		gutter = self._gutter(view)
+		if gutter:
+			self._render(gutter)
 
 	# FIXME this is OLD code that should be updated...
 	def toggle(self, view: sublime.View, line: int) -> None:
@@ -285,16 +436,8 @@ class Breakpoints:
 		if not file:
 			return
 
-		for b in self.breakpoints:
-			if b.file != file:
-				continue
-			if b.line != line:
-				continue
-			identifier = b.regionName
-
-			#FIXME this only removes from the view it was clicked on from
-			# it could be visible in multiple views...
-			view.erase_regions(identifier)
+		b = self.get_breakpoint(file, line)
+		if b:
 			self.remove_breakpoint(b)
 			return
 		#add the breakpoint
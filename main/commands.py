@@ -6,15 +6,12 @@ from sublime_db.core.typecheck import List
 from sublime_db import core
 from sublime_db.libs import asyncio
 
-from sublime_db.main.main import Main
-from sublime_db.main.debug_adapter_client.client import DebugAdapterClient
-from sublime_db.main.adapter_configuration import AdapterConfiguration, install_adapter
-from .configurations import add_configuration
-
-from sublime_db.main.debugger import DebuggerState
+# everything else is imported when the debugger is first opened see loader
+from .loader import main_for_window, debugger_for_window
+from .debugger_states import DebuggerStates
 
 def DebuggerInState(window: sublime.Window, state: int) -> bool:
-	debugger = Main.debuggerForWindow(window)
+	debugger = debugger_for_window(window)
 	if debugger and debugger.state == state:
 		return True
 	return False
@@ -27,17 +24,17 @@ class RunMainCommand(sublime_plugin.WindowCommand):
 
 class DebugWindowCommand(RunMainCommand):
 	def is_visible(self) -> bool:
-		return Main.forWindow(self.window) != None
+		return main_for_window(self.window) != None
 
 class SublimeDebugOpenCommand(RunMainCommand):
 	def run_main (self) -> None:
-		main = Main.forWindow(self.window, True)
+		main = main_for_window(self.window, True)
 		assert main
 		main.show()
 
 class SublimeDebugToggleBreakpointCommand(RunMainCommand):
 	def run_main(self) -> None:
-		main = Main.forWindow(self.window, True)
+		main = main_for_window(self.window, True)
 		assert main
 		view = self.window.active_view()
 		x, y = view.rowcol(view.sel()[0].begin())
@@ -50,82 +47,107 @@ class SublimeDebugToggleBreakpointCommand(RunMainCommand):
 			main.breakpoints.add_breakpoint(file, line)
 
 	def is_enabled(self) -> bool:
-		return Main.forWindow(self.window) != None
+		return main_for_window(self.window) != None
 
 class SublimeDebugQuitCommand(RunMainCommand):
 	def run_main(self) -> None:
-		main = Main.forWindow(self.window)
+		main = main_for_window(self.window)
 		if main:
 			main.dispose()
 
 class SublimeDebugStartCommand(DebugWindowCommand):
 	def run_main(self) -> None:
-		main = Main.forWindow(self.window, True)
+		main = main_for_window(self.window, True)
 		if main: main.OnPlay()
 		
 	def is_enabled(self) -> bool:
-		return not Main.forWindow(self.window) or DebuggerInState(self.window, DebuggerState.stopped)
+		return not main_for_window(self.window) or DebuggerInState(self.window, DebuggerStates.stopped)
 		
+# starts another session alongside the ones that are running (see Sessions)
+class SublimeDebugStartSessionCommand(DebugWindowCommand):
+	def run_main(self) -> None:
+		main = main_for_window(self.window)
+		if main: main.OnPlay()
+
+	def is_enabled(self) -> bool:
+		main = main_for_window(self.window)
+		return bool(main and main.sessions.running)
+
 class SublimeDebugStopCommand(DebugWindowCommand):
 	def run_main(self) -> None:
-		main = Main.forWindow(self.window)
+		main = main_for_window(self.window)
 		if main: main.OnStop()
 	def is_enabled(self) -> bool:
-		return not DebuggerInState(self.window, DebuggerState.stopped)
+		return not DebuggerInState(self.window, DebuggerStates.stopped)
 
 class SublimeDebugPauseCommand(DebugWindowCommand):
 	def run_main(self) -> None:
-		main = Main.forWindow(self.window)
+		main = main_for_window(self.window)
 		if main: main.OnPause()
 	def is_enabled(self) -> bool:
-		return DebuggerInState(self.window, DebuggerState.running)
+		return DebuggerInState(self.window, DebuggerStates.running)
 
 class SublimeDebugStepOverCommand(DebugWindowCommand):
 	def run_main(self) -> None:
-		main = Main.forWindow(self.window)
+		main = main_for_window(self.window)
 		if main: main.OnStepOver()
 	def is_enabled(self) -> bool:
-		return DebuggerInState(self.window, DebuggerState.paused)
+		return DebuggerInState(self.window, DebuggerStates.paused)
 
 class SublimeDebugStepInCommand(DebugWindowCommand):
 	def run_main(self) -> None:
-		main = Main.forWindow(self.window)
+		main = main_for_window(self.window)
 		if main: main.OnStepIn()
 	def is_enabled(self) -> bool:
-		return DebuggerInState(self.window, DebuggerState.paused)
+		return DebuggerInState(self.window, DebuggerStates.paused)
 
 class SublimeDebugStepOutCommand(DebugWindowCommand):
 	def run_main(self) -> None:
-		main = Main.forWindow(self.window)
+		main = main_for_window(self.window)
 		if main: main.OnStepOut()
 	def is_enabled(self) -> bool:
-		return DebuggerInState(self.window, DebuggerState.paused)
+		return DebuggerInState(self.window, DebuggerStates.paused)
 
 class SublimeDebugResumeCommand(DebugWindowCommand):
 	def run_main(self) -> None:
-		main = Main.forWindow(self.window)
+		main = main_for_window(self.window)
 		if main: main.OnResume()
 	def is_enabled(self) -> bool:
-		return DebuggerInState(self.window, DebuggerState.paused)
+		return DebuggerInState(self.window, DebuggerStates.paused)
 
 class SublimeDebugRunCommandCommand(DebugWindowCommand):
 	def run_main(self) -> None:
-		main = Main.forWindow(self.window, True)
+		main = main_for_window(self.window, True)
 		main.open_repl_console()
 
+class SublimeDebugDumpProtocolTraceCommand(DebugWindowCommand):
+	def run_main(self) -> None:
+		main = main_for_window(self.window)
+		if main: core.run(main.dump_protocol_trace())
+
+class SublimeDebugRunBenchmarksCommand(RunMainCommand):
+	def run_main(self) -> None:
+		main = main_for_window(self.window, True)
+		if main:
+			from .benchmark import run_benchmarks
+			core.run(run_benchmarks(main))
+
 class SublimeDebugAddConfiguration(RunMainCommand):
 	def run_main(self) -> None:
-		main = Main.forWindow(self.window, True)
+		from .configurations import add_configuration
+		main = main_for_window(self.window, True)
 		core.run(add_configuration(self.window, main.adapters))
 		
 class SublimeDebugInstallAdapter(RunMainCommand):
 	def run_main(self) -> None:
-		main = Main.forWindow(self.window, True)
+		main = main_for_window(self.window, True)
 		self.adapters = main.adapters
 		core.run(self.install())
 		
 	@core.async
 	def install(self) -> core.awaitable[None]:
+		from .adapter_configuration import AdapterConfiguration, install_adapter
+
 		names = []
 		adapters = []
 
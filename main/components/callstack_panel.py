@@ -1,7 +1,7 @@
 
 import os
 
-from sublime_db.core.typecheck import (List, Callable, Optional)
+from sublime_db.core.typecheck import (List, Callable, Optional, Dict)
 from sublime_db import ui
 from sublime_db import core
 
@@ -15,31 +15,47 @@ from sublime_db.main.debugger import (
 class CallStackPanel (ui.Component):
 	def __init__(self) -> None:
 		super().__init__()
-		self.threads = [] #type: List[Thread]
+		self.sessions = [] #type: List[DebuggerState]
+		self.active = None #type: Optional[DebuggerState]
 		self.selected = 0 #type: int
-		self.thread_components = [] #type: List[ThreadComponent]
+		# kept across renders so threads keep the frames they loaded, threads are the same instance for as long as their adapter is running
+		self.thread_components = {} #type: Dict[Thread, ThreadComponent]
 
 	def dirty_threads(self) -> None:
-		for thread_component in self.thread_components:
+		for thread_component in self.thread_components.values():
 			thread_component.dirty()
 
-	def update(self, debugger: DebuggerState, threads: List[Thread]) -> None:
-		self.threads = threads
-		self.debugger = debugger
+	# the threads of every session, only the active session shows its selected thread/frame
+	def update(self, sessions: List[DebuggerState], active: DebuggerState) -> None:
+		self.sessions = list(sessions)
+		self.active = active
 		self.dirty()
 		
 	def render(self) -> ui.components:			
-		self.thread_components = []
-		for thread in self.threads:
-			item = ThreadComponent(self.debugger, thread)
-			self.thread_components.append(item)
+		thread_components = {} #type: Dict[Thread, ThreadComponent]
+		items = [] #type: List[ui.Component]
+		for session in self.sessions:
+			if not session.threads:
+				continue
+			# label the threads with their session once there is more than one
+			if len(self.sessions) > 1:
+				items.append(ui.Label(session.name, padding_left = 0.5, color = ('secondary', 'primary')[session == self.active]))
+			for thread in session.threads:
+				item = self.thread_components.get(thread)
+				if item:
+					item.update(session == self.active)
+				else:
+					item = ThreadComponent(session, thread, session == self.active)
+				thread_components[thread] = item
+				items.append(item)
+		self.thread_components = thread_components
 		return [
 			ui.HorizontalSpacer(250),
 			ui.Panel(items = [
 				ui.Segment(items = [
 					ui.Label('Call Stack')
 				]),
-				ui.Table(items = self.thread_components)
+				ui.Table(items = items)
 			])
 		]
 
@@ -73,19 +89,36 @@ class StackFrameComponent (ui.Component):
 		]
 
 class ThreadComponent (ui.Component):
-	def __init__(self, debugger: DebuggerState, thread: Thread) -> None:
+	def __init__(self, debugger: DebuggerState, thread: Thread, active: bool = True) -> None:
 		super().__init__()
 		self.thread = thread
+		self.active = active
 		self.fetched = False
+		self.loading = False
 		self.debugger = debugger
 		self.frames = [] #type: List[StackFrame]
+		# the stop (DebugAdapterClient.stops) the frames were fetched for
+		self.stop = -1
+		self.page_size = debugger.stack_frames_page_size
+		self.update(active)
+
+	# called when the call stack panel renders this thread again
+	def update(self, active: bool) -> None:
+		self.active = active
+		if self.stop != self.thread.client.stops:
+			self.stop = self.thread.client.stops
+			self.fetched = False
+			self.loading = False
+			self.frames = []
 		self.fetch_frames_if_needed()
 
 		# If there is not an active selected frame or thread we select this thread
 		# it will be the first thread in the list
-		if thread.stopped and not self.debugger.thread and not self.debugger.frame:
+		if self.thread.stopped and not self.debugger.thread and not self.debugger.frame:
 			self.on_select_thread()
 
+		self.dirty()
+
 	def on_select_thread(self) -> None:
 		self.debugger.set_selected_thread(self.thread)
 
@@ -97,13 +130,31 @@ class ThreadComponent (ui.Component):
 	def fetch_frames_if_needed(self) -> None:
 		if self.thread.stopped and self.thread.expanded and not self.fetched:
 			self.fetched = True
+			stop = self.stop = self.thread.client.stops
 			def response(frames: List[StackFrame]) -> None:
+				# the thread ran and stopped again since we asked for these
+				if stop != self.stop:
+					return
 				if frames and not self.debugger.frame:
 					self.debugger.set_selected_frame(frames[0])
 				self.frames = frames
 				self.dirty()
 					
-			core.run(self.thread.client.GetStackTrace(self.thread), response)
+			core.run(self.thread.client.GetStackTrace(self.thread, 0, self.page_size), response)
+
+	def fetch_more_frames(self) -> None:
+		if self.loading or not self.frames or not self.thread.has_more_frames:
+			return
+		self.loading = True
+		stop = self.stop
+		def response(frames: List[StackFrame]) -> None:
+			if stop != self.stop:
+				return
+			self.loading = False
+			self.frames.extend(frames)
+			self.dirty()
+
+		core.run(self.thread.client.GetStackTrace(self.thread, len(self.frames), self.page_size), response)
 
 	def onClicked(self, index: int) -> None:
 		frame = self.frames[index]
@@ -148,15 +199,20 @@ class ThreadComponent (ui.Component):
 				component = StackFrameComponent(self.debugger, frame, on_click)
 
 				# if a thread is not selected and a frame is selected we select that index in the table
-				if not self.debugger.thread and self.debugger.frame and self.debugger.frame == frame:
+				if self.active and not self.debugger.thread and self.debugger.frame and self.debugger.frame == frame:
 					selected_index = index
 
 				frames.append(component)
 			
+			if self.frames and self.thread.has_more_frames:
+				frames.append(ui.Button(self.fetch_more_frames, items = [
+					ui.Label('load more frames', padding_left = 0.5, color = 'secondary')
+				]))
+
 			table = ui.Table(items = frames, selected_index = selected_index)
 			items.append(table)
 
-		if self.debugger.thread and self.debugger.thread == self.thread:
+		if self.active and self.debugger.thread and self.debugger.thread == self.thread:
 			item.add_class('selected')
 			
 		return items
@@ -16,6 +16,8 @@ class VariableComponent (ui.Component):
 	def __init__(self, variable: Variable) -> None:
 		super().__init__()
 		self.variable = VariableState(variable, self.dirty)
+		# rendering the same variable again keeps this component so it keeps its expansion and fetched children
+		self.key = variable
 
 	def on_edit(self) -> None:
 		def on_done(value: Optional[str]) -> None:
@@ -70,16 +72,42 @@ class VariableComponent (ui.Component):
 			inner = [] #type: List[ui.Component]
 			for variable in self.variable.variables:
 				inner.append(VariableComponent(variable))
+			if self.variable.has_more:
+				inner.append(LoadMoreComponent(self.variable.load_more, self.variable.remaining))
 			table = ui.Table(items = inner)
 			table.add_class('inset')
 			items.append(table)
 
 		return items
 
+# shown after the last fetched page of a large container
+class LoadMoreComponent (ui.Component):
+	def __init__(self, on_click: Callable[[], None], remaining: int) -> None:
+		super().__init__()
+		self.on_click = on_click
+		self.remaining = remaining
+
+	def render(self) -> ui.components:
+		return [
+			ui.Button(self.on_click, items = [
+				ui.Label('load more ({} remaining)'.format(self.remaining), padding_left = 0.5, color = 'secondary')
+			])
+		]
+
 class ScopeComponent (ui.Component):
-	def __init__(self, scope: Scope) -> None:
+	def __init__(self, scope: Scope, on_rendered_variables: Optional[Callable[[], None]] = None, expand: bool = False) -> None:
 		super().__init__()
 		self.scope = ScopeState(scope, self.dirty)
+		self.key = scope
+		# called by the first render that includes the fetched variables
+		self.on_rendered_variables = on_rendered_variables
+		self.expand_when_added = expand
+
+	# only a scope that wasn't shown before is expanded (and fetched), rendering one again keeps the previous instance see reconcile
+	def added(self, layout: ui.Layout) -> None:
+		if self.expand_when_added:
+			self.expand_when_added = False
+			self.scope.expand()
 
 	def render (self) -> ui.components:
 		if self.scope.expanded:
@@ -98,9 +126,15 @@ class ScopeComponent (ui.Component):
 			variables = [] #type: List[ui.Component]
 			for variable in self.scope.variables:
 				variables.append(VariableComponent(variable))
+			if self.scope.has_more:
+				variables.append(LoadMoreComponent(self.scope.load_more, self.scope.remaining))
 			table = ui.Table(items = variables)
 			table.add_class('inset')
 			items.append(table)
 
+			if self.scope.fetched and self.on_rendered_variables:
+				self.on_rendered_variables()
+				self.on_rendered_variables = None
+
 		return items
 
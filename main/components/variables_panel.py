@@ -14,15 +14,30 @@ class VariablesPanel (ui.Component):
 	def __init__(self) -> None:
 		super().__init__()
 		self.scopes = [] #type: List[Scope]
+		# the stop the scopes are from (core.main_loop.time()) and the last stop we reported the stop to painted locals latency for
+		self.stopped_time = 0.0
+		self.reported_stopped_time = 0.0
 
 	def clear(self) -> None:
 		self.scopes = []
 		self.dirty()
 
-	def set_scopes(self, scopes: List[Scope]) -> None:
+	def set_scopes(self, scopes: List[Scope], stopped_time: float = 0.0) -> None:
 		self.scopes = scopes
+		self.stopped_time = stopped_time
 		self.dirty()
 
+	def on_rendered_locals(self) -> None:
+		# selecting another frame or session shows scopes from a stop we already reported
+		stopped_time = self.stopped_time
+		if not stopped_time or stopped_time == self.reported_stopped_time or not self.layout:
+			return
+		self.reported_stopped_time = stopped_time
+
+		def on_painted() -> None:
+			print('Debugger: stop to painted locals {:.1f}ms'.format((core.main_loop.time() - stopped_time) * 1000))
+		self.layout.on_next_paint(on_painted)
+
 	def render(self) -> ui.components:
 		items = [
 			ui.Segment(items = [ui.Label('Variables')])
@@ -30,13 +45,14 @@ class VariablesPanel (ui.Component):
 
 		scopes_items = [] #type: List[ui.Component]
 
-		# expand the first scope only
+		# expand the first scope only, it is expanded when it is added so a scope we already show keeps its state
 		first = True
 		for v in self.scopes:
-			scopes_item = ScopeComponent(v)
 			if first:
 				first = False
-				scopes_item.scope.toggle_expand()
+				scopes_item = ScopeComponent(v, self.on_rendered_locals, expand = True)
+			else:
+				scopes_item = ScopeComponent(v)
 			scopes_items.append(scopes_item)
 		
 		items.append(ui.Table(items = scopes_items))
@@ -1,17 +1,28 @@
 
 from sublime_db.core.typecheck import (
 	Optional,
-	List
+	List,
+	Any
 )
 
 import sublime
 import os
 import json
+import hashlib
+import tempfile
+import threading
+
+from sublime_db import core
 
 FILE_LOG = 'debug.log'
 FILE_BREAKPOINTS = 'breakpoints_data.json'
 FILE_SETTINGS = 'debug.sublime-settings'
+# older versions kept every project in this one file, it is only read to move a project to its own file
 FILE_PERSISTANCE = 'persistance.json'
+DIRECTORY_PERSISTANCE = 'persistance'
+
+# seconds to wait after the last change before writing it to disk
+SAVE_DELAY = 1.0
 
 def package_path(path: str) -> str:
 	return "{}/sublime_db/{}".format(sublime.packages_path(), path)
@@ -20,8 +31,31 @@ from .breakpoints import Breakpoints, Breakpoint
 from .configurations import Configuration
 
 class PersistedData:
+	'''
+		the persisted state of one project (breakpoints and the selected configuration) kept in its own file in the persistance directory
+		the file is only read the first time the data is needed
+
+		changes are written after SAVE_DELAY on main_executor, the file is written to a temporary file and renamed over the old one so a crash never leaves half a file behind
+		call flush when the window goes away to write any pending changes right away
+	'''
 	def __init__(self, project_name: str) -> None:
-		self.data = _persisted_for_project(project_name)
+		self.project_name = project_name
+		self.path = package_path('{}/{}.json'.format(DIRECTORY_PERSISTANCE, hashlib.sha1(project_name.encode('utf-8')).hexdigest()))
+		self._data = None #type: Optional[dict]
+
+		self.breakpoints = None #type: Optional[Breakpoints]
+		self.handle = None #type: Optional[Any]
+
+		# every save gets a version so a write that finishes late can't replace a newer one
+		self.version = 0
+		self.written_version = 0
+		self.lock = threading.Lock()
+
+	@property
+	def data(self) -> dict:
+		if self._data is None:
+			self._data = _load_project(self.path, self.project_name)
+		return self._data
 
 	def save_breakpoints(self, breakpoints: Breakpoints) -> None:
 		json_breakpoints = []
@@ -59,28 +93,85 @@ class PersistedData:
 				
 		return None
 
-	def save_to_file(self) -> None:
-		_save_all_data()
-
-_all_data = None #type: Optional[dict]
-
-def _save_all_data() -> None:
-	assert not _all_data is None
-	data = json.dumps(_all_data)
-	file = open(package_path(FILE_PERSISTANCE), 'w+')
-	contents = file.write(data)
-	file.close()
+	def save(self, breakpoints: Optional[Breakpoints] = None) -> None:
+		'''
+			writes the data after SAVE_DELAY, if breakpoints are passed they are saved at that point too
+			every call pushes the write back so a burst of changes is written once
+		'''
+		if breakpoints:
+			self.breakpoints = breakpoints
+		if self.handle:
+			self.handle.cancel()
+		self.handle = core.main_loop.call_later(SAVE_DELAY, self._on_save)
+
+	def _snapshot(self) -> str:
+		if self.handle:
+			self.handle.cancel()
+			self.handle = None
+		if self.breakpoints:
+			self.save_breakpoints(self.breakpoints)
+			self.breakpoints = None
+		self.version += 1
+		return json.dumps(self.data)
+
+	def _on_save(self) -> None:
+		self.handle = None
+		core.run(self._save())
+
+	@core.async
+	def _save(self) -> core.awaitable[None]:
+		contents = self._snapshot()
+		try:
+			yield from core.main_loop.run_in_executor(core.main_executor, self._write, contents, self.version)
+		except Exception as e:
+			print('Unable to save {}: {}'.format(self.path, e))
+			core.log_exception()
+
+	def flush(self) -> None:
+		'''
+			writes any pending changes now instead of in the background
+		'''
+		if self.handle or self.breakpoints:
+			self._write(self._snapshot(), self.version)
+
+	def _write(self, contents: str, version: int) -> None:
+		with self.lock:
+			if version <= self.written_version:
+				return
+			_write_atomic(self.path, contents)
+			self.written_version = version
+
+def _write_atomic(path: str, contents: str) -> None:
+	directory = os.path.dirname(path)
+	os.makedirs(directory, exist_ok = True)
+	descriptor, temporary_path = tempfile.mkstemp(dir = directory, suffix = '.tmp')
+	try:
+		with os.fdopen(descriptor, 'w') as file:
+			file.write(contents)
+			file.flush()
+			os.fsync(file.fileno())
+		os.replace(temporary_path, path)
+	except:
+		os.remove(temporary_path)
+		raise
+
+def _load_project(path: str, project_name: str) -> dict:
+	try:
+		with open(path, 'r') as file:
+			return json.load(file)
+	except FileNotFoundError:
+		pass
+	except ValueError as e:
+		print('Unable to read {}: {}'.format(path, e))
+		return {}
 
-def _persisted_for_project(project_name: str) -> dict:
-	global _all_data
+	# nothing saved for this project yet, see if an older version saved it in the shared file
 	try:
-		file = open(package_path(FILE_PERSISTANCE), 'r+')
-		contents = file.read()
-		file.close()
-		_all_data = json.loads(contents)
+		with open(package_path(FILE_PERSISTANCE), 'r') as file:
+			return json.load(file).get(project_name, {})
 	except FileNotFoundError:
-		_all_data = {}
-	assert not _all_data is None
-	project_data = _all_data.setdefault(project_name, {})
-	return project_data
+		return {}
+	except ValueError as e:
+		print('Unable to read {}: {}'.format(FILE_PERSISTANCE, e))
+		return {}
 
@@ -14,6 +14,8 @@ from sublime_db.core.typecheck import Tuple, List, Optional, Callable, Union, Di
 import socket
 import threading
 import json
+import time
+from collections import OrderedDict
 
 from sublime_db.libs import asyncio
 from sublime_db import ui, core
@@ -21,6 +23,50 @@ from sublime_db.main.breakpoints import Breakpoints, Breakpoint, BreakpointResul
 
 from .types import StackFrame, Variable, Thread, Scope, EvaluateResponse, CompletionItem, Source
 from .transport import Transport
+from .trace import ProtocolTrace
+
+# read only requests that concurrent callers can share when they are made with the same arguments
+COALESCED_COMMANDS = {'threads', 'scopes', 'variables', 'stackTrace', 'source'}
+# responses that stay valid until the debuggee runs again
+CACHED_COMMANDS = {'scopes', 'variables', 'stackTrace', 'source'}
+RESPONSE_CACHE_SIZE = 512
+
+class ResponseCache:
+	'''
+		least recently used cache of responses for the current stop
+		everything is thrown away when the debuggee runs again (or the adapter tells us its state was invalidated)
+		the epoch is bumped on every invalidation so responses for requests sent before it can be ignored
+	'''
+	def __init__(self, size: int = RESPONSE_CACHE_SIZE) -> None:
+		self.size = size
+		self.epoch = 0
+		self.entries = OrderedDict() #type: OrderedDict
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, key: str) -> Optional[dict]:
+		value = self.entries.get(key)
+		if value is None:
+			self.misses += 1
+			return None
+		self.hits += 1
+		self.entries.move_to_end(key)
+		return value
+
+	def put(self, epoch: int, key: str, value: dict) -> None:
+		if epoch != self.epoch:
+			return
+		self.entries[key] = value
+		self.entries.move_to_end(key)
+		while len(self.entries) > self.size:
+			self.entries.popitem(last = False)
+
+	def invalidate(self) -> None:
+		self.epoch += 1
+		self.entries.clear()
+
+	def stats(self) -> str:
+		return 'response cache: {} hits, {} misses'.format(self.hits, self.misses)
 
 class DebuggerState:
 	exited = 1
@@ -47,10 +93,16 @@ class OutputEvent:
 
 @core.all_methods(core.require_main_thread)
 class DebugAdapterClient:
-	def __init__(self, transport: Transport) -> None:
+	def __init__(self, transport: Transport, trace: Optional[ProtocolTrace] = None) -> None:
+		self.trace = trace
 		self.transport = transport
+		self.transport.trace = trace
 		self.transport.start(self.transport_message, self.transport_closed)
 		self.pending_requests = {} #type: Dict[int, core.future]
+		self.in_flight_requests = {} #type: Dict[str, core.future]
+		self.requests_sent = {} #type: Dict[str, int]
+		self.requests_coalesced = {} #type: Dict[str, int]
+		self.response_cache = ResponseCache()
 		self.seq = 0
 
 		self.threads = [] #type: List[Thread]
@@ -58,6 +110,8 @@ class DebugAdapterClient:
 
 		self.allThreadsStopped = False
 		self.stoppedOnError = False
+		# incremented by every stopped event, anything fetched for a stop (like stack frames) is stale once it changes
+		self.stops = 0
 		self.onExited = core.Event() #type: core.Event[Any]
 		self.onStopped = core.Event() #type: core.Event[Any]
 		self.onContinued = core.Event() #type: core.Event[Any]
@@ -68,6 +122,12 @@ class DebugAdapterClient:
 		self._on_initialized_future = core.main_loop.create_future()
 		self._on_terminated_future = core.main_loop.create_future()
 		self.breakpoints_for_id = {} #type: Dict[int, Breakpoint]
+		# results from setBreakpoints are merged into these, set by BreakpointSync
+		self.breakpoints = None #type: Optional[Breakpoints]
+
+		# time spent handling messages on the main loop, messages are decoded by the transport
+		self.messages_handled = 0
+		self.message_handling_time = 0.0
 
 	def transport_closed(self) -> None:
 		print('Debugger Transport: closed')
@@ -75,14 +135,31 @@ class DebugAdapterClient:
 			self.on_error_event.post('Debug Adapter process was terminated prematurely')
 			self._on_terminated({})
 
-	def transport_message(self, message: str) -> None:
-		print('>> ', message)
-		msg = json.loads(message)
-		self.recieved_msg(msg)
+	def transport_message(self, messages: List[dict]) -> None:
+		start_time = time.perf_counter()
+		# a batch of messages is delivered at once, don't let one bad message drop the rest of the batch
+		for message in messages:
+			try:
+				self.recieved_msg(message)
+			except Exception:
+				core.log_exception()
+
+		self.messages_handled += len(messages)
+		self.message_handling_time += time.perf_counter() - start_time
+
+	def message_handling_stats(self) -> str:
+		average = self.message_handling_time / self.messages_handled if self.messages_handled else 0
+		return '{} messages handled, {:.3f}ms main loop time per message'.format(self.messages_handled, average * 1000)
 
 	def dispose(self) -> None:
 		print('disposing Debugger')
+		core.log_info('Debugger: {}'.format(self.message_handling_stats()))
+		core.log_info('Debugger: {}'.format(self.request_stats()))
+		core.log_info('Debugger: {}'.format(self.response_cache.stats()))
 		self.transport.dispose()
+		# the results from this adapter no longer say anything about the breakpoints
+		if self.breakpoints:
+			self.breakpoints.clear_breakpoint_results(self)
 
 	@core.async
 	def StepIn(self, thread: Thread) -> core.awaitable[None]:
@@ -131,15 +208,25 @@ class DebugAdapterClient:
 			scopes.append(scope)
 		return scopes
 
+	# levels = 0 fetches all the frames starting at startFrame
 	@core.async
-	def GetStackTrace(self, thread: Thread) -> core.awaitable[List[StackFrame]]:
-		body = yield from self.send_request_asyc('stackTrace', {
+	def GetStackTrace(self, thread: Thread, startFrame: int = 0, levels: int = 0) -> core.awaitable[List[StackFrame]]:
+		args = {
 			"threadId" : thread.id
-		})
+		} #type: dict
+		if startFrame:
+			args['startFrame'] = startFrame
+		if levels:
+			args['levels'] = levels
+
+		body = yield from self.send_request_asyc('stackTrace', args)
 		frames = []
 		for frame in body['stackFrames']:
 			frame = StackFrame.from_json(thread, frame)
 			frames.append(frame)
+
+		total = body.get('totalFrames')
+		thread.has_more_frames = bool(levels) and len(frames) == levels and (not total or startFrame + len(frames) < total)
 		return frames
 
 	@core.async
@@ -235,6 +322,8 @@ class DebugAdapterClient:
 		
 		variable.value = response['value']
 		variable.variablesReference = response.get('variablesReference', 0)
+		variable.namedVariables = response.get('namedVariables', 0)
+		variable.indexedVariables = response.get('indexedVariables', 0)
 		return variable
 
 	@core.async
@@ -247,7 +336,7 @@ class DebugAdapterClient:
 			"linesStartAt1":True,
 			"columnsStartAt1":True,
 			"supportsVariableType": True,
-			"supportsVariablePaging": False,
+			"supportsVariablePaging": True,
 			"supportsRunInTerminalRequest": False,
 			"locale":"en-us"}
 		)
@@ -310,53 +399,36 @@ class DebugAdapterClient:
 					self.breakpoints_for_id[id] = breakpoint
 
 		except Exception as e:
+			assert self.breakpoints
 			for breakpoint in breakpoints:
 				result = BreakpointResult(False, breakpoint.line, str(e))
-				self.breakpoints.set_breakpoint_result(breakpoint, result)
+				self.breakpoints.set_breakpoint_result(breakpoint, result, self)
 				
 			raise e #re raise the exception
 
 	def _merg_breakpoint(self, breakpoint: Breakpoint, breakpoint_result: dict) -> None:
+		assert self.breakpoints
 		result = BreakpointResult(breakpoint_result['verified'], breakpoint_result.get('line', breakpoint.line), breakpoint_result.get('message'))
-		self.breakpoints.set_breakpoint_result(breakpoint, result)
-
-	@core.async
-	def AddBreakpoints(self, breakpoints: Breakpoints) -> core.awaitable[None]:
-		self.breakpoints = breakpoints
-		requests = [] #type: List[core.awaitable[dict]]
-		bps = {} #type: Dict[str, List[Breakpoint]]
-		for breakpoint in breakpoints.breakpoints:
-			if breakpoint.file in bps:
-				bps[breakpoint.file].append(breakpoint)
-			else:
-				bps[breakpoint.file] = [breakpoint]
-			
-			print(breakpoint, breakpoint.file)
-
-		print('breakpoints:', bps)
-		for file, filebreaks in bps.items():
-			requests.append(self.SetBreakpointsFile(file, filebreaks))
-
-		filters = []
-		for filter in breakpoints.filters:
-			if filter.enabled:
-				filters.append(filter.id)
-
-		requests.append(self.send_request_asyc('setExceptionBreakpoints', {
-			'filters' : filters
-		}))
-		if requests:
-			yield from asyncio.wait(requests)
+		self.breakpoints.set_breakpoint_result(breakpoint, result, self)
 
 	@core.async
 	def ConfigurationDone(self) -> core.awaitable[None]:
 		yield from self.send_request_asyc('configurationDone', {})
 
+	# filter, start and count are used to page through large containers see VariableState
 	@core.async
-	def GetVariables(self, variablesReference: int) -> core.awaitable[List[Variable]]:
-		response = yield from self.send_request_asyc('variables', {
+	def GetVariables(self, variablesReference: int, filter: Optional[str] = None, start: Optional[int] = None, count: Optional[int] = None) -> core.awaitable[List[Variable]]:
+		args = {
 			"variablesReference" : variablesReference
-		})
+		} #type: dict
+		if filter:
+			args['filter'] = filter
+		if not start is None:
+			args['start'] = start
+		if not count is None:
+			args['count'] = count
+
+		response = yield from self.send_request_asyc('variables', args)
 		variables = []
 		for v in response['variables']:
 			var = Variable.from_json(self, v)
@@ -370,6 +442,7 @@ class DebugAdapterClient:
 		self._on_initialized_future.set_result(None)
 	
 	def _continued(self, threadId: int, allThreadsContinued: bool) -> None:
+		self._invalidate_responses()
 		if allThreadsContinued:
 
 			self.allThreadsStopped = False
@@ -390,6 +463,8 @@ class DebugAdapterClient:
 		self._continued(threadId, body.get('allThreadsContinued', True))
 
 	def _on_stopped(self, body: dict) -> None:
+		self.stops += 1
+		self._invalidate_responses()
 		#only ask for threads if there was a reason for the stoppage
 		threadId = body.get('threadId', None)
 		allThreadsStopped = body.get('allThreadsStopped', False)
@@ -426,6 +501,9 @@ class DebugAdapterClient:
 		data = OutputEvent(category, body['output'], body.get('variablesReference', 0))
 		self.onOutput.post(data)
 
+	def _on_invalidated(self, body: dict) -> None:
+		self._invalidate_responses()
+
 	def _on_thread(self, body: dict) -> None:
 		self.threadsCommandBase()
 
@@ -441,6 +519,21 @@ class DebugAdapterClient:
 
 	@core.async
 	def send_request_asyc(self, command: str, args: dict) -> core.awaitable[dict]:
+		key = None #type: Optional[str]
+		if command in COALESCED_COMMANDS:
+			key = command + json.dumps(args, sort_keys = True)
+			if command in CACHED_COMMANDS:
+				cached = self.response_cache.get(key)
+				if not cached is None:
+					return cached
+
+			in_flight = self.in_flight_requests.get(key)
+			if in_flight:
+				self.requests_coalesced[command] = self.requests_coalesced.get(command, 0) + 1
+				# shield the shared future so one of the callers being cancelled doesn't cancel it for everyone
+				value = yield from asyncio.shield(in_flight, loop = core.main_loop)
+				return value
+
 		future = core.main_loop.create_future()
 		self.seq += 1
 		request = {
@@ -450,11 +543,52 @@ class DebugAdapterClient:
 			"arguments" : args
 		}
 		self.pending_requests[self.seq] = future
+		self.requests_sent[command] = self.requests_sent.get(command, 0) + 1
+		if key:
+			self._add_in_flight_request(key, future)
+
 		msg = json.dumps(request)
+		if self.trace:
+			self.trace.sent(request, len(msg))
 		self.transport.send(msg)
 
-		value = yield from future
+		if not key:
+			value = yield from future
+			self._invalidate_cache_after_request(command, args)
+			return value
+
+		epoch = self.response_cache.epoch
+		value = yield from asyncio.shield(future, loop = core.main_loop)
+		if command in CACHED_COMMANDS:
+			self.response_cache.put(epoch, key, value)
 		return value
+
+	def _invalidate_responses(self) -> None:
+		self.response_cache.invalidate()
+		# requests that are still in flight may return stale data, new callers shouldn't share them
+		self.in_flight_requests.clear()
+
+	def _invalidate_cache_after_request(self, command: str, args: dict) -> None:
+		# these can change the value of variables without the debuggee running
+		if command == 'setVariable' or command == 'setExpression' or (command == 'evaluate' and args.get('context') != 'hover'):
+			self._invalidate_responses()
+
+	def _add_in_flight_request(self, key: str, future: core.future) -> None:
+		self.in_flight_requests[key] = future
+		def on_done(future: core.future) -> None:
+			if self.in_flight_requests.get(key) == future:
+				del self.in_flight_requests[key]
+		future.add_done_callback(on_done)
+
+	def request_stats(self) -> str:
+		stats = []
+		for command, count in sorted(self.requests_sent.items()):
+			coalesced = self.requests_coalesced.get(command, 0)
+			if coalesced:
+				stats.append('{} {} ({} round trips saved)'.format(command, count, coalesced))
+			else:
+				stats.append('{} {}'.format(command, count))
+		return 'requests sent: {}'.format(', '.join(stats))
 	
 	def recieved_msg(self, data: dict) -> None:
 		t = data['type']
@@ -484,4 +618,6 @@ class DebugAdapterClient:
 			if event == 'thread':
 				return self._on_thread(body)
 			if event == 'breakpoint':
-				return self._on_breakpoint(body)
\ No newline at end of file
+				return self._on_breakpoint(body)
+			if event == 'invalidated':
+				return self._on_invalidated(body)
\ No newline at end of file
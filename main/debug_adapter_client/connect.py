@@ -0,0 +1,113 @@
+'''
+	connects to debug adapters that are started as a server (tcp_port in the adapter configuration)
+
+	the adapter is usually still starting up when we first try to connect so attempts are retried with an exponential backoff
+	we give up as soon as the adapter process exits instead of waiting for the timeout
+	if the adapter configuration has a tcp_ready pattern we wait for the adapter to print a matching line before the first attempt
+'''
+from sublime_db.core.typecheck import Optional, Any
+
+import socket
+import time
+
+from sublime_db import core
+from sublime_db.libs import asyncio
+
+from .transport import (
+	Transport,
+	TCPTransport,
+	Process,
+	start_async_tcp_transport,
+	TCP_CONNECT_TIMEOUT
+)
+from .trace import ProtocolTrace
+
+BACKOFF_START = 0.01
+BACKOFF_MAX = 0.5
+PROCESS_POLL_INTERVAL = 0.05
+
+def _check_process(process: Optional[Process]) -> None:
+	if not process:
+		return
+	code = process.process.poll()
+	if not code is None:
+		raise Exception('Debug adapter process exited with code {} before a connection was made'.format(code))
+
+@core.async
+def _wait_for_ready(process: Process, pattern: str, deadline: float) -> core.awaitable[None]:
+	ready = process.wait_for_output(pattern)
+	try:
+		while not ready.done():
+			_check_process(process)
+			remaining = deadline - time.perf_counter()
+			if remaining <= 0:
+				raise Exception('Timeout waiting for the debug adapter to print "{}"'.format(pattern))
+			yield from asyncio.wait([ready], timeout = min(PROCESS_POLL_INTERVAL, remaining), loop = core.main_loop)
+	finally:
+		ready.cancel()
+
+@core.async
+def _connect_socket(address_info: Any) -> core.awaitable[socket.socket]:
+	family, type, proto, _, address = address_info
+	sock = socket.socket(family, type, proto)
+	sock.setblocking(False)
+	try:
+		yield from core.main_loop.sock_connect(sock, address)
+	except:
+		sock.close()
+		raise
+	return sock
+
+@core.async
+def connect_tcp_transport(host: str, port: int, process: Optional[Process] = None, ready_pattern: Optional[str] = None, use_asyncio: bool = True, trace: Optional[ProtocolTrace] = None, timeout: float = TCP_CONNECT_TIMEOUT) -> core.awaitable[Transport]:
+	start_time = time.perf_counter()
+	deadline = start_time + timeout
+
+	if process and ready_pattern:
+		yield from _wait_for_ready(process, ready_pattern, deadline)
+		if trace:
+			trace.note('adapter ready', time.perf_counter() - start_time)
+
+	print('connecting to {}:{}'.format(host, port))
+	address_infos = yield from core.main_loop.getaddrinfo(host, port, type = socket.SOCK_STREAM)
+	if not address_infos:
+		raise Exception('Unable to resolve {}'.format(host))
+
+	attempts = 0
+	delay = BACKOFF_START
+	sock = None #type: Optional[socket.socket]
+	while True:
+		attempts += 1
+		_check_process(process)
+		# like socket.create_connection try every address, localhost often resolves to ::1 before 127.0.0.1
+		error = None #type: Optional[Exception]
+		for address_info in address_infos:
+			# an address that drops the connection would otherwise wait for the os connect timeout which can be well past our deadline
+			remaining = max(deadline - time.perf_counter(), BACKOFF_START)
+			try:
+				sock = yield from asyncio.wait_for(_connect_socket(address_info), remaining, loop = core.main_loop)
+				break
+			except OSError as e:
+				error = e
+			except asyncio.TimeoutError:
+				error = Exception('connecting to {} timed out'.format(address_info[4]))
+		if sock:
+			break
+
+		remaining = deadline - time.perf_counter()
+		if remaining <= 0:
+			raise Exception('Timeout connecting to socket after {} attempts: {}'.format(attempts, error))
+		yield from asyncio.sleep(min(delay, remaining), loop = core.main_loop)
+		delay = min(delay * 2, BACKOFF_MAX)
+
+	elapsed = time.perf_counter() - start_time
+	print('connected to {}:{} in {:.0f}ms after {} attempts'.format(host, port, elapsed * 1000, attempts))
+	if trace:
+		trace.note('connected after {} attempts'.format(attempts), elapsed)
+
+	if use_asyncio:
+		transport = yield from start_async_tcp_transport(sock)
+		return transport
+
+	sock.setblocking(True)
+	return TCPTransport(sock)
@@ -0,0 +1,151 @@
+'''
+	plays back a recorded debug adapter session without running a debug adapter
+
+	recordings are the dumped protocol traces from ProtocolTrace (with record_messages) see trace.py
+'''
+from sublime_db.core.typecheck import Optional, List, Dict, Any, Callable, Tuple, Set
+
+from collections import deque
+import json
+
+from sublime_db import core
+from .transport import Transport, MessageDispatch
+from .trace import SENT, RECEIVED
+
+def load_recording(path: str) -> List[dict]:
+	with open(path, 'r') as file:
+		return json.load(file)['entries']
+
+def _request_key(command: str, arguments: Optional[dict]) -> str:
+	return command + json.dumps(arguments or {}, sort_keys = True)
+
+class ReplayTransport(Transport):
+	'''
+		events are played back in the order they were recorded at their recorded time divided by speed (0 plays them back as fast as possible)
+
+		responses are sent after their recorded latency when the client makes a request
+		they are matched to the recorded request with the same command and arguments if there is one, otherwise to the next recorded response for that command
+		once the recorded responses for a command run out the last one is reused so a client that makes more requests than were recorded still gets answers
+	'''
+	def __init__(self, entries: List[dict], speed: float = 1.0) -> None:
+		self.speed = speed
+		self.events = [] #type: List[Tuple[float, dict]]
+		self.responses_for_key = {} #type: Dict[str, deque]
+		self.responses_for_command = {} #type: Dict[str, deque]
+		self.last_response_for_command = {} #type: Dict[str, Tuple[float, dict]]
+		self.used = set() #type: Set[int]
+
+		requests = {} #type: Dict[int, dict]
+		for entry in entries:
+			message = entry.get('message')
+			if not message:
+				continue
+
+			if entry['direction'] == SENT and message.get('type') == 'request':
+				requests[message['seq']] = message
+				continue
+
+			if entry['direction'] != RECEIVED:
+				continue
+
+			if message.get('type') == 'response':
+				response = ((entry.get('latency_ms') or 0) / 1000, message)
+				self.responses_for_command.setdefault(message['command'], deque()).append(response)
+				request = requests.get(message.get('request_seq', -1))
+				if request:
+					key = _request_key(request['command'], request.get('arguments'))
+					self.responses_for_key.setdefault(key, deque()).append(response)
+			else:
+				self.events.append((entry['time_ms'] / 1000, message))
+
+		self.next_event = 0
+		self.start_time = 0.0
+		self.closed = False
+		self.messages_sent = 0
+		self.finished = core.main_loop.create_future()
+
+	def start(self, on_receive: 'Callable[[List[dict]], None]', on_closed: 'Callable[[], None]') -> None:
+		self.dispatch = MessageDispatch(on_receive)
+		self.on_closed = on_closed
+		self.start_time = core.main_loop.time()
+		self._play_events()
+
+	def _delay(self, seconds: float) -> float:
+		if not self.speed:
+			return 0.0
+		return seconds / self.speed
+
+	# only one timer is ever pending so events with the same time are still played back in order
+	def _play_events(self) -> None:
+		if self.closed:
+			return
+
+		now = core.main_loop.time()
+		while self.next_event < len(self.events):
+			time, message = self.events[self.next_event]
+			at = self.start_time + self._delay(time)
+			if at > now:
+				core.main_loop.call_at(at, self._play_events)
+				return
+			self.next_event += 1
+			if self.trace:
+				self.trace.received(message, 0)
+			self.dispatch.post(message)
+
+		if not self.finished.done():
+			self.finished.set_result(None)
+
+	def _take(self, responses: Optional[deque]) -> Optional[Tuple[float, dict]]:
+		while responses:
+			response = responses.popleft()
+			# a response is in a queue for its command and possibly one for its request's arguments so skip ones handed out from the other queue
+			if not id(response) in self.used:
+				self.used.add(id(response))
+				return response
+		return None
+
+	def _take_response(self, command: str, arguments: Optional[dict]) -> Optional[Tuple[float, dict]]:
+		response = self._take(self.responses_for_key.get(_request_key(command, arguments))) or self._take(self.responses_for_command.get(command))
+		if response:
+			self.last_response_for_command[command] = response
+			return response
+		return self.last_response_for_command.get(command)
+
+	def send(self, message: str) -> None:
+		if self.closed:
+			return
+
+		self.messages_sent += 1
+		request = json.loads(message)
+		command = request['command']
+		response = self._take_response(command, request.get('arguments'))
+		if response:
+			latency, recorded = response
+			reply = dict(recorded)
+		else:
+			latency = 0.0
+			reply = {
+				'type': 'response',
+				'command': command,
+				'success': False,
+				'message': 'no recorded response for {}'.format(command),
+			}
+		reply['request_seq'] = request['seq']
+
+		core.main_loop.call_later(self._delay(latency), self._respond, reply)
+
+	def _respond(self, reply: dict) -> None:
+		if self.closed:
+			return
+		if self.trace:
+			self.trace.received(reply, 0)
+		self.dispatch.post(reply)
+
+	def close(self) -> None:
+		if self.closed: return
+		self.closed = True
+		print('Transport: {}'.format(self.dispatch.stats()))
+		core.main_loop.call_soon(self.on_closed)
+
+	def dispose(self) -> None:
+		self.close()
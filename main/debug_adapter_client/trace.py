@@ -0,0 +1,134 @@
+'''
+	records the messages sent to and received from a debug adapter
+
+	tracing is off unless the trace_protocol setting is enabled
+	when it is off the transports and client only check that their trace is None
+
+	with record_messages the messages themselves are kept as well and the dumped trace can be played back with ReplayTransport
+'''
+from sublime_db.core.typecheck import Optional, List, Dict, Any
+
+from collections import deque
+import threading
+import time
+import json
+
+TRACE_SIZE = 10000
+
+SENT = '<<'
+RECEIVED = '>>'
+NOTE = '--'
+
+# upper bounds in milliseconds of each bucket in a latency histogram, the last bucket catches everything else
+LATENCY_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+class LatencyHistogram:
+	def __init__(self) -> None:
+		self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+
+	def add(self, latency: float) -> None:
+		milliseconds = latency * 1000
+		self.count += 1
+		self.total += milliseconds
+		if milliseconds > self.max:
+			self.max = milliseconds
+
+		for index, bound in enumerate(LATENCY_BUCKETS):
+			if milliseconds <= bound:
+				self.counts[index] += 1
+				return
+		self.counts[-1] += 1
+
+	def into_json(self) -> dict:
+		buckets = {} #type: Dict[str, int]
+		for bound, count in zip(LATENCY_BUCKETS, self.counts):
+			buckets['<={}ms'.format(bound)] = count
+		buckets['>{}ms'.format(LATENCY_BUCKETS[-1])] = self.counts[-1]
+		return {
+			'count': self.count,
+			'average_ms': self.total / self.count if self.count else 0,
+			'max_ms': self.max,
+			'buckets': buckets,
+		}
+
+class ProtocolTrace:
+	'''
+		ring buffer of (timestamp, direction, command, seq, bytes, latency) entries and a latency histogram per command
+		sent is called from the writing side and received from the transport's reader thread
+	'''
+	def __init__(self, size: int = TRACE_SIZE, record_messages: bool = False) -> None:
+		self.record_messages = record_messages
+		self.start_time = time.time()
+		self.entries = deque(maxlen = size) #type: deque
+		self.histograms = {} #type: Dict[str, LatencyHistogram]
+		self.sent_at = {} #type: Dict[int, float]
+		self.lock = threading.Lock()
+
+	def sent(self, message: dict, size: int) -> None:
+		timestamp = time.perf_counter()
+		command = message.get('command') or message.get('type', '?')
+		seq = message.get('seq', 0)
+		with self.lock:
+			if message.get('type') == 'request':
+				self.sent_at[seq] = timestamp
+			self.entries.append((timestamp, SENT, command, seq, size, None, message if self.record_messages else None))
+
+	def received(self, message: dict, size: int) -> None:
+		timestamp = time.perf_counter()
+		t = message.get('type')
+		latency = None #type: Optional[float]
+		with self.lock:
+			if t == 'response':
+				command = message.get('command', '?')
+				seq = message.get('request_seq', 0)
+				sent_at = self.sent_at.pop(seq, None)
+				if not sent_at is None:
+					latency = timestamp - sent_at
+					self.histograms.setdefault(command, LatencyHistogram()).add(latency)
+			elif t == 'event':
+				command = message.get('event', '?')
+				seq = message.get('seq', 0)
+			else:
+				command = message.get('command') or t or '?'
+				seq = message.get('seq', 0)
+			self.entries.append((timestamp, RECEIVED, command, seq, size, latency, message if self.record_messages else None))
+
+	def note(self, name: str, duration: float) -> None:
+		'''
+			records something that is not a protocol message but is part of the session timeline (connecting to the adapter...)
+		'''
+		with self.lock:
+			self.entries.append((time.perf_counter(), NOTE, name, 0, 0, duration, None))
+
+	def into_json(self) -> dict:
+		with self.lock:
+			entries = list(self.entries)
+			histograms = {command: histogram.into_json() for command, histogram in self.histograms.items()}
+
+		base = entries[0][0] if entries else 0.0
+		json_entries = []
+		for timestamp, direction, command, seq, size, latency, message in entries:
+			entry = {
+				'time_ms': (timestamp - base) * 1000,
+				'direction': direction,
+				'command': command,
+				'seq': seq,
+				'bytes': size,
+				'latency_ms': latency * 1000 if not latency is None else None,
+			}
+			if message:
+				entry['message'] = message
+			json_entries.append(entry)
+
+		return {
+			'start_time': self.start_time,
+			'entries': json_entries,
+			'latency': histograms,
+		}
+
+	def dump(self, path: str) -> None:
+		with open(path, 'w') as file:
+			json.dump(self.into_json(), file, indent = '\t')
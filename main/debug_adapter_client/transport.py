@@ -24,31 +24,115 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 '''
 
-from sublime_db.core.typecheck import Optional, List, Any, Callable, Generator
+from sublime_db.core.typecheck import Optional, List, Any, Callable, Generator, Tuple
 
-from queue import Queue
+from queue import Queue, Empty
+from collections import deque
 import subprocess
 import socket
 import threading
 import time
+import os
+import re
+
+# use a faster json decoder if one is available otherwise fall back to the standard library
+try:
+	from ujson import loads as json_loads #type: ignore
+except ImportError:
+	from json import loads as json_loads
 
 from sublime_db import core
+from sublime_db.libs import asyncio
+from .trace import ProtocolTrace
+
+def asyncio_pipes_supported() -> bool:
+	'''
+		the main loop is a selector loop which can only wait on pipes on posix, on windows only sockets work
+	'''
+	return os.name != 'nt'
+
+class _LineProtocol(asyncio.Protocol):
+	'''
+		calls on_line with each line read from a pipe, like file.readline() the line includes the newline
+	'''
+	def __init__(self, on_line: Callable[[str], None]) -> None:
+		self.on_line = on_line
+		self.buffer = b''
+
+	def data_received(self, data: bytes) -> None:
+		lines = (self.buffer + data).split(b'\n')
+		self.buffer = lines.pop()
+		for line in lines:
+			self.on_line(line.decode('UTF-8') + '\n')
+
+	def connection_lost(self, exc: Optional[Exception]) -> None:
+		if self.buffer:
+			self.on_line(self.buffer.decode('UTF-8'))
+			self.buffer = b''
 
 class Process:
-	def __init__(self, command: List[str], on_stdout: Optional[Callable[[str], None]], on_stderr: Optional[Callable[[str], None]]) -> None:
+	'''
+		with use_asyncio stdout/stderr are read on the main loop (so the process must be created on the main loop)
+		otherwise each one is read on its own thread
+
+		on_stderr can be replaced after the process has started (see AdapterPool)
+	'''
+	def __init__(self, command: List[str], on_stdout: Optional[Callable[[str], None]], on_stderr: Optional[Callable[[str], None]], use_asyncio: bool = False) -> None:
 		print('Starting process: {}'.format(command))
 		self.process = subprocess.Popen(command, stdout = subprocess.PIPE, stderr = subprocess.PIPE, stdin = subprocess.PIPE)
 		self.on_stdout = on_stdout
 		self.on_stderr = on_stderr
+		self.output_watchers = [] #type: List[Tuple[Any, asyncio.Future]]
 
 		if on_stdout:
-			thread = threading.Thread(target=self._read, args= (self.process.stdout, on_stdout))
-			thread.start()
+			self._start_reading(self.process.stdout, self._on_stdout, use_asyncio)
 
 		if on_stderr:
-			thread = threading.Thread(target=self._read, args= (self.process.stderr, on_stderr))
+			self._start_reading(self.process.stderr, self._on_stderr, use_asyncio)
+
+	def _start_reading(self, file: Any, callback: Callable[[str], None], use_asyncio: bool) -> None:
+		if use_asyncio:
+			core.run(core.main_loop.connect_read_pipe(lambda: _LineProtocol(callback), file))
+		else:
+			thread = threading.Thread(target=self._read, args= (file, callback))
 			thread.start()
 
+	def wait_for_output(self, pattern: str) -> asyncio.Future:
+		'''
+			resolves with the next line printed to stdout that matches pattern, stdout must be read (on_stdout)
+		'''
+		assert self.on_stdout, 'expected process to read stdout'
+		future = core.main_loop.create_future()
+		self.output_watchers.append((re.compile(pattern), future))
+		return future
+
+	def _on_stdout(self, line: str) -> None:
+		if self.output_watchers:
+			for pattern, future in self.output_watchers:
+				if not future.done() and pattern.search(line):
+					future.set_result(line)
+			self.output_watchers = [watcher for watcher in self.output_watchers if not watcher[1].done()]
+
+		assert self.on_stdout
+		self.on_stdout(line)
+
+	def _on_stderr(self, line: str) -> None:
+		if self.on_stderr:
+			self.on_stderr(line)
+
+	def memory_usage(self) -> Optional[int]:
+		'''
+			resident memory of the process in bytes or None if it can't be read on this platform (only linux has /proc)
+		'''
+		try:
+			with open('/proc/{}/status'.format(self.process.pid)) as file:
+				for line in file:
+					if line.startswith('VmRSS:'):
+						return int(line.split()[1]) * 1024
+		except (IOError, ValueError):
+			pass
+		return None
+
 	def _read (self, file: Any, callback: Callable[[str], None]) -> None:
 		while True:
 			try:
@@ -70,25 +154,219 @@ class Process:
 
 
 class Transport:
+	# set by the client before the transport is started, None unless tracing is enabled
+	trace = None #type: Optional[ProtocolTrace]
+
+	# read/write calls made over the session, printed when the transport is closed
+	reads = 0
+	writes = 0
+	messages_written = 0
+	# seconds of main loop time spent decoding messages, threaded transports decode on their reader threads
+	decode_time = 0.0
+
+	def io_stats(self) -> str:
+		return '{} reads, {} writes for {} messages sent'.format(self.reads, self.writes, self.messages_written)
+
 	def send(self, message: str) -> None:
 		assert False
-	def start(self, on_receive: 'Callable[[str], None]', on_closed: 'Callable[[], None]') -> None:
+	def start(self, on_receive: 'Callable[[List[dict]], None]', on_closed: 'Callable[[], None]') -> None:
 		assert False
 	def dispose(self) -> None:
 		assert False
 
-STATE_HEADERS = 0
-STATE_CONTENT = 1
 TCP_CONNECT_TIMEOUT = 5
 CONTENT_HEADER = b"Content-Length: "
+HEADERS_END = b"\r\n\r\n"
+READ_SIZE = 65536
+# AsyncTransport decodes batches larger than this on core.main_executor instead of the main loop
+DECODE_IN_EXECUTOR_SIZE = 65536
+
+def frame(messages: List[str]) -> bytes:
+	'''
+		frames messages into a single buffer so they can be written with one call
+	'''
+	parts = [] #type: List[bytes]
+	for message in messages:
+		content = bytes(message, 'UTF-8')
+		parts.append(bytes('Content-Length: {}\r\n\r\n'.format(len(content)), 'UTF-8'))
+		parts.append(content)
+	return b''.join(parts)
+
+def drain_send_queue(queue: 'Queue[Optional[str]]') -> Tuple[List[str], bool]:
+	'''
+		blocks until a message is queued then takes every other message that is already queued
+		returns the messages and whether the transport was closed (None was queued)
+	'''
+	messages = [] #type: List[str]
+	message = queue.get()
+	while True:
+		if message is None:
+			return messages, True
+		messages.append(message)
+		try:
+			message = queue.get_nowait()
+		except Empty:
+			return messages, False
+
+class MessageReader:
+	'''
+		incremental decoder for the Content-Length framed messages of the debug adapter protocol
+
+		data is read directly into a growable bytearray (recv_into/readinto) and decoded in place
+		consumed data is only compacted when we need more room so large messages are not copied over and over again
+	'''
+	def __init__(self, read_size: int = READ_SIZE) -> None:
+		self.read_size = read_size
+		self.buffer = bytearray(read_size)
+		self.start = 0 # start of the unconsumed data
+		self.end = 0 # end of the data read so far
+		self.content_length = -1 # length of the message being read or -1 if we are reading headers
+
+	def _reserve(self, size: int) -> None:
+		if len(self.buffer) - self.end >= size:
+			return
+
+		# move the unconsumed data to the front of the buffer
+		if self.start > 0:
+			remaining = self.end - self.start
+			self.buffer[0:remaining] = self.buffer[self.start:self.end]
+			self.start = 0
+			self.end = remaining
+
+		if len(self.buffer) - self.end < size:
+			self.buffer.extend(bytes(max(len(self.buffer), self.end + size - len(self.buffer))))
+
+	def read_into(self, read: Callable[[memoryview], int]) -> int:
+		'''
+			calls read with a writable view of the free space in the buffer (socket.recv_into, file.readinto)
+			returns the number of bytes read, 0 means the other end was closed
+		'''
+		self._reserve(self.read_size)
+		with memoryview(self.buffer) as view, view[self.end:] as free:
+			count = read(free) or 0
+		self.end += count
+		return count
+
+	def feed(self, data: bytes) -> None:
+		'''
+			appends data that has already been read (asyncio protocols are handed bytes instead of reading them)
+		'''
+		self._reserve(len(data))
+		self.buffer[self.end:self.end + len(data)] = data
+		self.end += len(data)
+
+	def messages(self) -> Generator[str, None, None]:
+		'''
+			yields every complete message that has been read so far
+		'''
+		while True:
+			if self.content_length < 0:
+				index = self.buffer.find(HEADERS_END, self.start, self.end)
+				if index < 0:
+					return
+
+				content_length = 0
+				for header in bytes(self.buffer[self.start:index]).split(b"\r\n"):
+					if header.startswith(CONTENT_HEADER):
+						content_length = int(header[len(CONTENT_HEADER):])
+
+				self.start = index + len(HEADERS_END)
+				self.content_length = content_length
+				# make sure the whole message fits so we only grow the buffer once for large messages
+				self._reserve(content_length - (self.end - self.start))
+
+			if self.end - self.start < self.content_length:
+				return
+
+			message_end = self.start + self.content_length
+			with memoryview(self.buffer) as view, view[self.start:message_end] as content:
+				message = str(content, "UTF-8")
+
+			self.start = message_end
+			self.content_length = -1
+			if self.start == self.end:
+				self.start = 0
+				self.end = 0
+
+			yield message
+
+def decode_message(message: str, trace: Optional[ProtocolTrace]) -> Optional[dict]:
+	'''
+		decodes a message on the transport's reader thread so the main loop only ever sees ready dicts
+		AsyncTransport has no reader thread and decodes small batches on the main loop, see DECODE_IN_EXECUTOR_SIZE
+	'''
+	try:
+		msg = json_loads(message)
+	except ValueError as err:
+		print("Failure decoding message", err, message)
+		return None
+
+	if trace:
+		trace.received(msg, len(message))
+	return msg
+
+class MessageDispatch:
+	'''
+		hands decoded messages from a transport's reader thread to the main loop in batches
+
+		the reader appends to a deque (append/popleft are atomic) and only schedules a drain if one is not already pending
+		so a flood of messages wakes the main loop once instead of once per message
+	'''
+	def __init__(self, on_receive: 'Callable[[List[dict]], None]') -> None:
+		self.on_receive = on_receive
+		self.queue = deque() #type: deque
+		self.scheduled = False
+
+		self.messages = 0
+		self.batches = 0
+		self.largest_batch = 0
+		self.max_queue_depth = 0
+
+	# called from the reader thread
+	def post(self, message: dict) -> None:
+		self.queue.append(message)
+		depth = len(self.queue)
+		if depth > self.max_queue_depth:
+			self.max_queue_depth = depth
+
+		if not self.scheduled:
+			self.scheduled = True
+			core.main_loop.call_soon_threadsafe(self._drain)
+
+	def _drain(self) -> None:
+		# clear this before draining so anything posted after this point schedules another drain
+		self.scheduled = False
+		batch = [] #type: List[dict]
+		try:
+			while True:
+				batch.append(self.queue.popleft())
+		except IndexError:
+			pass
+
+		if not batch:
+			return
+
+		self.messages += len(batch)
+		self.batches += 1
+		if len(batch) > self.largest_batch:
+			self.largest_batch = len(batch)
+
+		self.on_receive(batch)
+
+	def stats(self) -> str:
+		average = self.messages / self.batches if self.batches else 0
+		return '{} messages in {} batches (average {:.1f}, largest {}), max queue depth {}'.format(self.messages, self.batches, average, self.largest_batch, self.max_queue_depth)
 
 class TCPTransport(Transport):
-	def __init__(self, s: socket.socket) -> None:
+	def __init__(self, s: socket.socket, read_size: int = READ_SIZE) -> None:
 		self.socket = s  # type: 'Optional[socket.socket]'
+		# messages are written as soon as they are queued so don't hold small writes back waiting for acks
+		s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 		self.send_queue = Queue()  # type: Queue[Optional[str]]
+		self.reader = MessageReader(read_size)
 
-	def start(self, on_receive: Callable[[str], None], on_closed: Callable[[], None]) -> None:
-		self.on_receive = on_receive
+	def start(self, on_receive: Callable[[List[dict]], None], on_closed: Callable[[], None]) -> None:
+		self.dispatch = MessageDispatch(on_receive)
 		self.on_closed = on_closed
 		self.read_thread = threading.Thread(target=self.read_socket)
 		self.read_thread.start()
@@ -99,103 +377,59 @@ class TCPTransport(Transport):
 		if self.socket == None: return
 		self.send_queue.put(None)  # kill the write thread as it's blocked on send_queue
 		self.socket = None
+		core.log_info('Transport: {}, {}'.format(self.dispatch.stats(), self.io_stats()))
 		core.main_loop.call_soon_threadsafe(self.on_closed)
 		
 	def dispose(self) -> None:
 		self.close()
 
 	def read_socket(self) -> None:
-		remaining_data = b""
-		is_incomplete = False
-		read_state = STATE_HEADERS
-		content_length = 0
 		while self.socket:
-			is_incomplete = False
 			try:
-				received_data = self.socket.recv(4096)
+				received = self.reader.read_into(self.socket.recv_into)
+				self.reads += 1
 			except Exception as err:
 				print("Failure reading from socket", err)
 				self.close()
 				break
 
-			if not received_data:
+			if not received:
 				print("no data received, closing")
 				self.close()
 				break
 
-			data = remaining_data + received_data
-			remaining_data = b""
-			while len(data) > 0 and not is_incomplete:
-				if read_state == STATE_HEADERS:
-					headers, _sep, rest = data.partition(b"\r\n\r\n")
-					if len(_sep) < 1:
-						is_incomplete = True
-						remaining_data = data
-					else:
-						for header in headers.split(b"\r\n"):
-							if header.startswith(CONTENT_HEADER):
-								header_value = header[len(CONTENT_HEADER):]
-								content_length = int(header_value)
-								read_state = STATE_CONTENT
-						data = rest
-
-				if read_state == STATE_CONTENT:
-					# read content bytes
-					if len(data) >= content_length:
-						content = data[:content_length]
-						message = content.decode("UTF-8")
-						core.main_loop.call_soon_threadsafe(self.on_receive, message)
-						data = data[content_length:]
-						read_state = STATE_HEADERS
-					else:
-						is_incomplete = True
-						remaining_data = data
+			for message in self.reader.messages():
+				msg = decode_message(message, self.trace)
+				if msg is not None:
+					self.dispatch.post(msg)
 
 	def send(self, message: str) -> None:
 		self.send_queue.put(message)
 
 	def write_socket(self) -> None:
 		while self.socket:
-			message = self.send_queue.get()
-			if message is None:
-				break
-			else:
+			messages, closed = drain_send_queue(self.send_queue)
+			if messages:
 				try:
-					self.socket.sendall(bytes('Content-Length: {}\r\n\r\n'.format(len(message)), 'UTF-8'))
-					self.socket.sendall(bytes(message, 'UTF-8'))
-					print(' << ', message)
+					self.socket.sendall(frame(messages))
+					self.writes += 1
+					self.messages_written += len(messages)
 				except Exception as err:
 					print("Failure writing to socket", err)
 					self.close()
+			if closed:
+				break
 
 
-# starts the tcp connection in a none blocking fashion 
-@core.async
-def start_tcp_transport(host: str, port: int) -> core.awaitable[TCPTransport]:
-	def start_tcp_transport_inner() -> TCPTransport:
-		print('connecting to {}:{}'.format(host, port))
-		start_time = time.time()
-		while time.time() - start_time < TCP_CONNECT_TIMEOUT:
-			try:
-				sock = socket.create_connection((host, port))
-				transport = TCPTransport(sock)
-				return transport
-			except ConnectionRefusedError as e:
-				pass
-		raise Exception("Timeout connecting to socket")
-
-	print('connecting to {}:{}'.format(host, port))
-	transport = yield from core.main_loop.run_in_executor(core.main_executor, start_tcp_transport_inner)
-	return transport
-
 class StdioTransport(Transport):
-	def __init__(self, process: Process) -> None:
+	def __init__(self, process: Process, read_size: int = READ_SIZE) -> None:
 		assert process.on_stdout == None, 'expected process to not read stdout'
 		self.process = process.process  # type: Optional[subprocess.Popen]
 		self.send_queue = Queue()  # type: Queue[Optional[str]]
+		self.reader = MessageReader(read_size)
 
-	def start(self, on_receive: 'Callable[[str], None]', on_closed: 'Callable[[], None]') -> None:
-		self.on_receive = on_receive
+	def start(self, on_receive: 'Callable[[List[dict]], None]', on_closed: 'Callable[[], None]') -> None:
+		self.dispatch = MessageDispatch(on_receive)
 		self.on_closed = on_closed
 		self.write_thread = threading.Thread(target=self.write_stdin)
 		self.write_thread.start()
@@ -206,6 +440,7 @@ class StdioTransport(Transport):
 		if self.process == None: return
 		self.process = None
 		self.send_queue.put(None)  # kill the write thread as it's blocked on send_queue
+		core.log_info('Transport: {}, {}'.format(self.dispatch.stats(), self.io_stats()))
 		core.main_loop.call_soon_threadsafe(self.on_closed)
 
 	def dispose(self) -> None:
@@ -215,31 +450,29 @@ class StdioTransport(Transport):
 		"""
 		Reads JSON responses from process and dispatch them to response_handler
 		"""
-		running = True
-		while running and self.process:
-			running = self.process.poll() is None
+		assert self.process
+		stdout = self.process.stdout
+		# read from the unbuffered pipe so data is only copied into our own buffer
+		file = getattr(stdout, 'raw', stdout)
 
+		while self.process:
 			try:
-				content_length = 0
-				while self.process:
-					header = self.process.stdout.readline()
-					if header:
-						header = header.strip()
-					if not header:
-						break
-					if header.startswith(CONTENT_HEADER):
-						content_length = int(header[len(CONTENT_HEADER):])
-
-				if (content_length > 0):
-					content = self.process.stdout.read(content_length)
-					message = content.decode("UTF-8")
-					core.main_loop.call_soon_threadsafe(self.on_receive, message)
+				received = self.reader.read_into(file.readinto)
+				self.reads += 1
+			except (IOError, ValueError) as err:
+				print("Failure reading stdout", err)
+				self.close()
+				break
 
-			except IOError as err:
+			if not received:
 				self.close()
-				print("Failure reading stdout", err)
 				break
 
+			for message in self.reader.messages():
+				msg = decode_message(message, self.trace)
+				if msg is not None:
+					self.dispatch.post(msg)
+
 		print("debug adapter process ended.")
 
 	def send(self, message: str) -> None:
@@ -247,15 +480,218 @@ class StdioTransport(Transport):
 
 	def write_stdin(self) -> None:
 		while self.process:
-			message = self.send_queue.get()
-			if message is None:
-				break
-			else:
+			messages, closed = drain_send_queue(self.send_queue)
+			if messages:
 				try:
-					self.process.stdin.write(bytes('Content-Length: {}\r\n\r\n'.format(len(message)), 'UTF-8'))
-					self.process.stdin.write(bytes(message, 'UTF-8'))
+					self.process.stdin.write(frame(messages))
 					self.process.stdin.flush()
-					print('<< ', message)
+					self.writes += 1
+					self.messages_written += len(messages)
 				except (BrokenPipeError, OSError) as err:
 					print("Failure writing to stdout", err)
-					self.close()
\ No newline at end of file
+					self.close()
+			if closed:
+				break
+
+
+class _AsyncTransportProtocol(asyncio.Protocol):
+	'''
+		asyncio starts reading as soon as the connection is made which is before the AsyncTransport exists
+		so anything received or a lost connection before then is held until attach is called
+	'''
+	def __init__(self) -> None:
+		self.owner = None #type: Optional[AsyncTransport]
+		self.received = [] #type: List[bytes]
+		self.lost = False
+
+	def attach(self, owner: 'AsyncTransport') -> None:
+		self.owner = owner
+		for data in self.received:
+			owner._data_received(data)
+		self.received = []
+		if self.lost:
+			owner.close()
+
+	def data_received(self, data: bytes) -> None:
+		if self.owner:
+			self.owner._data_received(data)
+		else:
+			self.received.append(data)
+
+	def connection_lost(self, exc: Optional[Exception]) -> None:
+		if exc:
+			print('Transport: connection lost', exc)
+		if self.owner:
+			self.owner.close()
+		else:
+			self.lost = True
+
+class AsyncTransport(Transport):
+	'''
+		reads and writes on the main loop with asyncio transports so a session doesn't need any threads of its own
+		and messages are never handed from one thread to another
+
+		everything read in one go is decoded and passed to the client as one batch
+		messages sent in the same loop iteration are framed together and written with one call
+		reading is paused until start is called so nothing is read before the client is listening
+
+		small batches are decoded on the main loop, batches larger than DECODE_IN_EXECUTOR_SIZE are decoded on core.main_executor
+		so a large response doesn't block rendering, reading is paused while they are decoded so messages stay in order
+	'''
+	def __init__(self, protocol: _AsyncTransportProtocol, read_transport: Any, write_transport: Any, read_size: int = READ_SIZE) -> None:
+		self.read_transport = read_transport
+		self.write_transport = write_transport
+		self.reader = MessageReader(read_size)
+		self.closed = False
+		self.on_receive = None #type: Optional[Callable[[List[dict]], None]]
+		self.on_closed = None #type: Optional[Callable[[], None]]
+		self.pending = [] #type: List[str]
+		self.decoding = False
+		# asyncio transports start out reading and raise if they are paused or resumed twice
+		self.reading = True
+
+		self.messages = 0
+		self.batches = 0
+		self.largest_batch = 0
+
+		protocol.attach(self)
+		self._set_reading(False)
+
+	def start(self, on_receive: 'Callable[[List[dict]], None]', on_closed: 'Callable[[], None]') -> None:
+		self.on_receive = on_receive
+		self.on_closed = on_closed
+		# anything read before we started has only been buffered
+		self._receive()
+		if not self.decoding:
+			if self.closed:
+				core.main_loop.call_soon(on_closed)
+			else:
+				self._set_reading(True)
+
+	def _set_reading(self, reading: bool) -> None:
+		if self.closed or self.reading == reading:
+			return
+		# a transport that is closing can't be paused, it won't read anything else anyway
+		if not reading and self.read_transport.is_closing():
+			return
+		self.reading = reading
+		if reading:
+			self.read_transport.resume_reading()
+		else:
+			self.read_transport.pause_reading()
+
+	def _data_received(self, data: bytes) -> None:
+		self.reads += 1
+		self.reader.feed(data)
+		if self.on_receive and not self.decoding:
+			self._receive()
+
+	def _receive(self) -> None:
+		messages = list(self.reader.messages())
+		if not messages:
+			return
+
+		if sum(len(message) for message in messages) > DECODE_IN_EXECUTOR_SIZE:
+			self.decoding = True
+			self._set_reading(False)
+			core.run(self._decode_in_executor(messages))
+			return
+
+		start_time = time.perf_counter()
+		batch = self._decode(messages)
+		self.decode_time += time.perf_counter() - start_time
+		self._deliver(batch)
+
+	def _decode(self, messages: List[str]) -> List[dict]:
+		batch = [] #type: List[dict]
+		for message in messages:
+			msg = decode_message(message, self.trace)
+			if msg is not None:
+				batch.append(msg)
+		return batch
+
+	@core.async
+	def _decode_in_executor(self, messages: List[str]) -> core.awaitable[None]:
+		try:
+			batch = yield from core.main_loop.run_in_executor(core.main_executor, self._decode, messages)
+		except Exception:
+			core.log_exception()
+			batch = []
+
+		self.decoding = False
+		self._deliver(batch)
+		# anything read while we were decoding
+		self._receive()
+		if self.decoding:
+			return
+
+		# close waits for the messages read before the connection was closed to be delivered
+		if not self.closed:
+			self._set_reading(True)
+		elif self.on_closed:
+			self.on_closed()
+
+	def _deliver(self, batch: List[dict]) -> None:
+		assert self.on_receive
+		if not batch:
+			return
+
+		self.messages += len(batch)
+		self.batches += 1
+		if len(batch) > self.largest_batch:
+			self.largest_batch = len(batch)
+
+		# an exception here would otherwise be treated as a read error by asyncio and close the transport
+		try:
+			self.on_receive(batch)
+		except Exception:
+			core.log_exception()
+
+	def send(self, message: str) -> None:
+		if self.closed:
+			return
+		self.pending.append(message)
+		if len(self.pending) == 1:
+			core.main_loop.call_soon(self._flush)
+
+	def _flush(self) -> None:
+		messages = self.pending
+		self.pending = []
+		if self.closed or not messages:
+			return
+		self.write_transport.write(frame(messages))
+		self.writes += 1
+		self.messages_written += len(messages)
+
+	def stats(self) -> str:
+		average = self.messages / self.batches if self.batches else 0
+		return '{} messages in {} batches (average {:.1f}, largest {})'.format(self.messages, self.batches, average, self.largest_batch)
+
+	def close(self) -> None:
+		if self.closed: return
+		self.closed = True
+		core.log_info('Transport: {}, {}'.format(self.stats(), self.io_stats()))
+		self.read_transport.close()
+		if not self.write_transport is self.read_transport:
+			self.write_transport.close()
+		if self.on_closed and not self.decoding:
+			core.main_loop.call_soon(self.on_closed)
+
+	def dispose(self) -> None:
+		self.close()
+
+# see connect.py for making the connection
+@core.async
+def start_async_tcp_transport(sock: socket.socket) -> core.awaitable[AsyncTransport]:
+	sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+	protocol = _AsyncTransportProtocol()
+	transport, _ = yield from core.main_loop.create_connection(lambda: protocol, sock = sock)
+	return AsyncTransport(protocol, transport, transport)
+
+@core.async
+def start_async_stdio_transport(process: Process) -> core.awaitable[AsyncTransport]:
+	assert process.on_stdout == None, 'expected process to not read stdout'
+	protocol = _AsyncTransportProtocol()
+	read_transport, _ = yield from core.main_loop.connect_read_pipe(lambda: protocol, process.process.stdout)
+	write_transport, _ = yield from core.main_loop.connect_write_pipe(lambda: protocol, process.process.stdin)
+	return AsyncTransport(protocol, read_transport, write_transport)
@@ -10,6 +10,8 @@ class Thread:
 		self.stopped = False
 		self.selected = False
 		self.expanded = False
+		# set by GetStackTrace when only part of the stack has been fetched
+		self.has_more_frames = False
 
 class StackFrame:
 	normal = 1
@@ -55,11 +57,13 @@ class StackFrame:
 
 
 class Scope:
-	def __init__(self, client: 'DebugAdapterClient', name: str, variablesReference: int, expensive: bool) -> None:
+	def __init__(self, client: 'DebugAdapterClient', name: str, variablesReference: int, expensive: bool, namedVariables: int = 0, indexedVariables: int = 0) -> None:
 		self.client = client
 		self.name = name
 		self.variablesReference = variablesReference
 		self.expensive = expensive
+		self.namedVariables = namedVariables
+		self.indexedVariables = indexedVariables
 
 	@staticmethod
 	def from_json(client: 'DebugAdapterClient', json: dict) -> 'Scope':
@@ -67,16 +71,20 @@ class Scope:
 			client, 
 			json['name'], 
 			json['variablesReference'], 
-			json['expensive']
+			json['expensive'],
+			json.get('namedVariables', 0),
+			json.get('indexedVariables', 0)
 		)
 
 class Variable:
-	def __init__(self, client: 'DebugAdapterClient', name: str, value: str, variablesReference: int, containerVariablesReference: int = 0) -> None:
+	def __init__(self, client: 'DebugAdapterClient', name: str, value: str, variablesReference: int, containerVariablesReference: int = 0, namedVariables: int = 0, indexedVariables: int = 0) -> None:
 		self.client = client
 		self.name = name
 		self.value = value
 		self.containerVariablesReference = 0
 		self.variablesReference = variablesReference
+		self.namedVariables = namedVariables
+		self.indexedVariables = indexedVariables
 
 	@staticmethod
 	def from_json(client: 'DebugAdapterClient', json: dict) -> 'Variable':
@@ -84,7 +92,10 @@ class Variable:
 			client, 
 			json['name'], 
 			json['value'], 
-			json.get('variablesReference', 0) 
+			json.get('variablesReference', 0),
+			0,
+			json.get('namedVariables', 0),
+			json.get('indexedVariables', 0)
 		)
 
 class EvaluateResponse:
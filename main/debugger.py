@@ -1,5 +1,7 @@
 from sublime_db.core.typecheck import (Tuple, List, Optional, Callable, Union, Dict, Any, Set)
 from sublime_db import core
+from sublime_db.libs import asyncio
+import time
 
 from .breakpoints import (
 	Breakpoints,  
@@ -13,11 +15,18 @@ from .debug_adapter_client.client import (
 	OutputEvent
 )
 from .debug_adapter_client.transport import (
-	start_tcp_transport, 
+	start_async_stdio_transport,
+	asyncio_pipes_supported,
 	Process, 
+	Transport,
 	TCPTransport, 
 	StdioTransport
 )
+from .debug_adapter_client.connect import connect_tcp_transport
+from .adapter_pool import AdapterPool
+from .breakpoint_sync import BreakpointSync, MOVED_DELAY
+from .debugger_states import DebuggerStates
+from .debug_adapter_client.trace import ProtocolTrace
 from .debug_adapter_client.types import (
 	StackFrame, 
 	EvaluateResponse, 
@@ -30,15 +39,9 @@ from .configurations import (
 	Configuration, 
 	AdapterConfiguration
 )
+from .util import get_setting
 
-class DebuggerState:
-	stopped = 0
-	paused = 1
-	running = 2
-
-	starting = 3
-	stopping = 4
-
+class DebuggerState(DebuggerStates):
 	def __init__(self, 
 		on_state_changed: Callable[[int], None], 
 		on_threads: Callable[[List[Thread]], None],
@@ -54,6 +57,11 @@ class DebuggerState:
 
 		self.adapter = None #type: Optional[DebugAdapterClient]
 		self.process = None #type: Optional[Process]
+		self.breakpoint_sync = None #type: Optional[BreakpointSync]
+		# name of the configuration that was launched
+		self.name = ''
+		# trace of the last session, kept after the session ends so it can still be dumped
+		self.trace = None #type: Optional[ProtocolTrace]
 
 		self.selected_frame = None #type: Optional[StackFrame]
 		self.selected_thread = None #type: Optional[Thread]
@@ -61,8 +69,11 @@ class DebuggerState:
 		self.frame = None #type: Optional[StackFrame]
 		self.thread = None #type: Optional[Thread]
 		self.threads = []  #type: List[Thread]
+		self.scopes = [] #type: List[Scope]
 
 		self.stopped_reason = ""
+		# core.main_loop.time() of the last stop, the variables panel reports how long it took to paint the locals from it
+		self.stopped_time = 0.0
 
 		self._state = DebuggerState.stopped
 		self.disposeables = [] #type: List[Any]
@@ -72,6 +83,10 @@ class DebuggerState:
 		for disposeable in self.disposeables:
 			disposeable.dispose()
 
+	@property
+	def stack_frames_page_size(self) -> int:
+		return get_setting(None, 'stack_frames_page_size', STACK_FRAMES_PAGE_SIZE)
+
 	@property
 	def state(self) -> int:
 		return self._state
@@ -84,24 +99,38 @@ class DebuggerState:
 		self._state = state
 		self.on_state_changed(state)
 
-	def launch(self, adapter_configuration: AdapterConfiguration, configuration: Configuration, breakpoints: Breakpoints) -> core.awaitable[None]:
+	# transport can be used to run a session without starting a debug adapter (see ReplayTransport)
+	def launch(self, adapter_configuration: AdapterConfiguration, configuration: Configuration, breakpoints: Breakpoints, transport: Optional[Transport] = None) -> core.awaitable[None]:
 		if self.state != DebuggerState.stopped:
 			print('ignoring launch, not stopped')
 			return
 
 		self.state = DebuggerState.starting
+		self.name = configuration.name
+
+		# created before connecting so the time it takes to connect is part of the trace
+		self.trace = None
+		if get_setting(None, 'trace_protocol', False):
+			self.trace = ProtocolTrace(record_messages = get_setting(None, 'trace_protocol_messages', False))
 
 		try:
 			if not adapter_configuration.installed:
 				raise Exception('Debug adapter with type name "{}" is not installed. You can install it by running Debugger: Install Adapters'.format(adapter_configuration.type))
 
+			# the threaded transports are still used if asyncio_transports is disabled or the main loop can't wait on pipes (windows)
+			use_asyncio = get_setting(None, 'asyncio_transports', True)
+			use_asyncio_pipes = use_asyncio and asyncio_pipes_supported()
+
 			#If there is a command to run for this debugger run it now
-			if adapter_configuration.tcp_port:
+			if transport:
+				pass
+			elif adapter_configuration.tcp_port:
 				print('Starting Process: {}'.format(adapter_configuration.command))
 				try:
 					self.process = Process(adapter_configuration.command, 
 						on_stdout = self._on_msg, 
-						on_stderr = self._on_msg)
+						on_stderr = self._on_msg,
+						use_asyncio = use_asyncio_pipes)
 				except Exception as e:
 					self.on_error('Failed to start debug adapter process: {}'.format(e))
 					self.on_error('Command in question: {}'.format(adapter_configuration.command))
@@ -110,33 +139,54 @@ class DebuggerState:
 					return
 				tcp_address = adapter_configuration.tcp_address or 'localhost'
 				try:
-					transport = yield from start_tcp_transport(tcp_address, adapter_configuration.tcp_port)
+					transport = yield from connect_tcp_transport(tcp_address, adapter_configuration.tcp_port, 
+						process = self.process, 
+						ready_pattern = adapter_configuration.tcp_ready, 
+						use_asyncio = use_asyncio, 
+						trace = self.trace)
 				except Exception as e:
+					self.process.dispose()
+					self.process = None
 					self.on_error('Failed to connect to debug adapter: {}'.format(e))
 					self.on_error('address: {} port: {}'.format(tcp_address, adapter_configuration.tcp_port))
 					core.display('Failed to connect to debug adapter: Check the Event Log for more details and messages from the debug adapter process?')
 					self.state = DebuggerState.stopped
 					return
 			else:
-				# dont monitor stdout the StdioTransport users it
-				self.process = Process(adapter_configuration.command, 
-						on_stdout = None, 
-						on_stderr = self._on_msg)
-				
-				transport = StdioTransport(self.process)
+				pooled = AdapterPool.shared.acquire(adapter_configuration) if AdapterPool.shared else None
+				if pooled:
+					print('Using pooled adapter started {:.1f}s ago'.format(time.time() - pooled.created))
+					self.process = pooled.process
+					self.process.on_stderr = self._on_msg
+					for line in pooled.stderr:
+						self._on_msg(line)
+					transport = pooled.transport
+				else:
+					# dont monitor stdout the StdioTransport users it
+					self.process = Process(adapter_configuration.command, 
+							on_stdout = None, 
+							on_stderr = self._on_msg,
+							use_asyncio = use_asyncio_pipes)
+					
+					if use_asyncio_pipes:
+						transport = yield from start_async_stdio_transport(self.process)
+					else:
+						transport = StdioTransport(self.process)
 
 		except Exception as e:
 			core.log_exception()
 			core.display(e)
 			self.state = DebuggerState.stopped
 			return
-		
-		adapter = DebugAdapterClient(transport)
+
+		adapter = DebugAdapterClient(transport, self.trace)
 		adapter.onThreads.add(self._on_threads_event)
 		adapter.onOutput.add(self._on_output_event)
 		adapter.onStopped.add(self._on_stopped_event)
 		adapter.onContinued.add(self._on_continued_event)
 		adapter.onExited.add(self._on_exited_event)
+		breakpoint_sync = BreakpointSync(adapter, breakpoints)
+		self.breakpoint_sync = breakpoint_sync
 
 		# this is a bit of a weird case. Initialized will happen at some point in time
 		# it depends on when the debug adapter chooses it is ready for configuration information
@@ -144,7 +194,7 @@ class DebuggerState:
 		@core.async
 		def Initialized() -> core.awaitable[None]:
 			yield from adapter.Initialized()
-			yield from adapter.AddBreakpoints(breakpoints)
+			yield from breakpoint_sync.initial_sync()
 			yield from adapter.ConfigurationDone()
 		core.run(Initialized())
 
@@ -171,11 +221,15 @@ class DebuggerState:
 	def force_stop_adapter(self) -> None:
 		self.selected_frame = None
 
+		self.threads = []
 		self.on_threads([])
-		self.on_scopes([])
+		self._set_scopes([])
 		self.on_selected_frame(None)
 
 		self.state = DebuggerState.stopped
+		if self.breakpoint_sync:
+			self.breakpoint_sync.dispose()
+			self.breakpoint_sync = None
 		if self.adapter:
 			self.adapter.dispose()
 			self.adapter = None
@@ -190,13 +244,18 @@ class DebuggerState:
 		else:
 			self.state = DebuggerState.running
 
-	def update_exception_filters(self, filters: List[Filter]) -> None:
-		if self.adapter:
-			core.run(self.adapter.setExceptionBreakpoints(filters))
+	def update_exception_filters(self) -> None:
+		if self.breakpoint_sync:
+			self.breakpoint_sync.filters_changed()
 
-	def update_breakpoints_for_file(self, file: str, breakpoints: List[Breakpoint]) -> None:
-		if self.adapter:
-			core.run(self.adapter.SetBreakpointsFile(file, breakpoints))
+	def update_breakpoints_for_file(self, file: str) -> None:
+		if self.breakpoint_sync:
+			self.breakpoint_sync.changed(file)
+
+	# the file is being edited so wait for the edits to stop before sending the new lines
+	def breakpoints_moved(self, file: str) -> None:
+		if self.breakpoint_sync:
+			self.breakpoint_sync.changed(file, MOVED_DELAY)
 
 	def stop(self) -> core.awaitable[None]:
 		if not self.adapter or self.state == DebuggerState.stopping:
@@ -243,9 +302,9 @@ class DebuggerState:
 		if new_frame:
 			self._refresh_state()
 			if self.adapter and frame:
-				core.run(self.adapter.GetScopes(frame), self.on_scopes)
+				core.run(self.adapter.GetScopes(frame), self._on_scopes)
 			else:
-				self.on_scopes([])
+				self._set_scopes([])
 
 	def set_selected_thread(self, thread: Optional[Thread]) -> None:
 		new_thread = self.thread != thread
@@ -267,9 +326,44 @@ class DebuggerState:
 
 	def _on_output_event(self, event: OutputEvent) -> None:
 		self.on_output(event)
+	def _on_scopes(self, scopes: List[Scope]) -> None:
+		self._set_scopes(scopes)
+
+	def _set_scopes(self, scopes: List[Scope]) -> None:
+		self.scopes = scopes
+		self.on_scopes(scopes)
+
 	def _on_stopped_event(self, event: StoppedEvent) -> None:
 		self._refresh_state()
 		self.stopped_reason = event.reason
+		self.stopped_time = core.main_loop.time()
+		core.run(self._prefetch_stopped_thread(event.thread))
+
+	@core.async
+	def _prefetch_stopped_thread(self, thread: Thread) -> core.awaitable[None]:
+		'''
+			speculatively fetch what the ui is going to ask for after a stop
+			the client shares in flight requests and caches responses until the next stop
+			so the call stack and variables panels pick these up instead of making their own round trips one after another
+			the threads request has already been sent by the client when it saw the stopped event
+		'''
+		client = thread.client
+		start_time = self.stopped_time
+		try:
+			frames = yield from client.GetStackTrace(thread, 0, self.stack_frames_page_size)
+			if not frames:
+				return
+			scopes = yield from client.GetScopes(frames[0])
+			requests = [] #type: List[core.awaitable[Tuple[List[Variable], int]]]
+			for scope in scopes:
+				if not scope.expensive:
+					requests.append(fetch_variables_page(client, scope.variablesReference, scope.indexedVariables, 0))
+			if requests:
+				yield from asyncio.gather(*requests, loop = core.main_loop)
+			print('Debugger: stop to prefetched locals {:.1f}ms'.format((core.main_loop.time() - start_time) * 1000))
+		except Exception as e:
+			# this is only an optimization the ui will make the requests again and report any errors
+			print('Debugger: prefetch failed', e)
 	def _thread_for_commands(self) -> Optional[Thread]:
 		if self.thread:
 			return self.thread
@@ -297,6 +391,33 @@ class DebuggerState:
 		self.force_stop_adapter()
 
 
+# containers with more indexed children than this are fetched a page at a time
+VARIABLES_PAGE_SIZE = 100
+
+@core.async
+def fetch_variables_page(client: DebugAdapterClient, variablesReference: int, indexedVariables: int, start: int) -> core.awaitable[Tuple[List[Variable], int]]:
+	'''
+		fetches the variables of a container starting at the indexed child start
+		the first page of a large container includes its named children
+		returns the variables and the index of the next page or 0 if there are no more pages
+	'''
+	if indexedVariables <= VARIABLES_PAGE_SIZE:
+		variables = yield from client.GetVariables(variablesReference)
+		return variables, 0
+
+	count = min(VARIABLES_PAGE_SIZE, indexedVariables - start)
+	next_start = start + count
+	if next_start >= indexedVariables:
+		next_start = 0
+
+	if start == 0:
+		named = yield from client.GetVariables(variablesReference, 'named')
+		indexed = yield from client.GetVariables(variablesReference, 'indexed', start, count)
+		return named + indexed, next_start
+
+	indexed = yield from client.GetVariables(variablesReference, 'indexed', start, count)
+	return indexed, next_start
+
 class VariableState:
 	def __init__(self, variable: Variable, on_updated: Callable[[], None]) -> None:
 		self.variable = variable
@@ -306,6 +427,7 @@ class VariableState:
 		self.fetched = False
 		self.loading = False
 		self.variables = [] #type: List[Variable]
+		self.next_start = 0
 
 	@property
 	def name(self) -> str:
@@ -319,6 +441,12 @@ class VariableState:
 	@property
 	def expandable(self) -> bool:
 		return self.variable.variablesReference != 0
+	@property
+	def has_more(self) -> bool:
+		return self.next_start != 0
+	@property
+	def remaining(self) -> int:
+		return self.variable.indexedVariables - self.next_start
 
 	def toggle_expand(self) -> None:
 		if self._expanded:
@@ -349,15 +477,27 @@ class VariableState:
 	def set_value(self, value: str) -> None:
 		core.run(self._set_value(value))
 
+	def load_more(self) -> None:
+		if self.loading or not self.has_more:
+			return
+		self.loading = True
+		core.run(fetch_variables_page(self.variable.client, self.variable.variablesReference, self.variable.indexedVariables, self.next_start), self._on_fetched_more)
+
 	def _fetch_if_needed(self, force_refetch: bool = False) -> None:
 		if (not self.fetched or force_refetch) and self.variable.variablesReference:
 			self.loading = True
-			core.run(self.variable.client.GetVariables(self.variable.variablesReference), self._on_fetched)
+			core.run(fetch_variables_page(self.variable.client, self.variable.variablesReference, self.variable.indexedVariables, 0), self._on_fetched)
 
-	def _on_fetched(self, variables: List[Variable]) -> None:
+	def _on_fetched(self, page: Tuple[List[Variable], int]) -> None:
 		self.fetched = True
 		self.loading = False
-		self.variables = variables
+		self.variables, self.next_start = page
+		self.on_updated()
+
+	def _on_fetched_more(self, page: Tuple[List[Variable], int]) -> None:
+		self.loading = False
+		variables, self.next_start = page
+		self.variables.extend(variables)
 		self.on_updated()
 
 class ScopeState: 
@@ -369,6 +509,7 @@ class ScopeState:
 		self.fetched = False
 		self.loading = False
 		self.variables = [] #type: List[Variable]
+		self.next_start = 0
 
 	@property
 	def name(self) -> str:
@@ -382,6 +523,13 @@ class ScopeState:
 	def expensive(self):
 		return self.scope.expensive
 
+	@property
+	def has_more(self) -> bool:
+		return self.next_start != 0
+	@property
+	def remaining(self) -> int:
+		return self.scope.indexedVariables - self.next_start
+
 	def toggle_expand(self) -> None:
 		if self._expanded:
 			self._expanded = False
@@ -398,64 +546,28 @@ class ScopeState:
 		if self._expanded:
 			self.toggle_expand()
 
+	def load_more(self) -> None:
+		if self.loading or not self.has_more:
+			return
+		self.loading = True
+		core.run(fetch_variables_page(self.scope.client, self.scope.variablesReference, self.scope.indexedVariables, self.next_start), self._on_fetched_more)
+
 	def _fetch_if_needed(self) -> None:
 		if not self.fetched and self.scope.variablesReference:
 			self.loading = True
-			core.run(self.scope.client.GetVariables(self.scope.variablesReference), self._on_fetched)
+			core.run(fetch_variables_page(self.scope.client, self.scope.variablesReference, self.scope.indexedVariables, 0), self._on_fetched)
 
-	def _on_fetched(self, variables: List[Variable]) -> None:
+	def _on_fetched(self, page: Tuple[List[Variable], int]) -> None:
 		self.fetched = True
 		self.loading = False
-		self.variables = variables
+		self.variables, self.next_start = page
 		self.on_updated()
 
-class ThreadState:
-	def __init__(self, thread: Thread, on_updated: Callable[[], None]) -> None:
-		self.thread = thread
-		self.on_updated = on_updated
-
-		self._expanded = False
-		self.fetched = False
+	def _on_fetched_more(self, page: Tuple[List[Variable], int]) -> None:
 		self.loading = False
-		self.frames = [] #type: List[StackFrame]
-
-	@property
-	def name(self) -> str:
-		return self.thread.name
-	@property
-	def stopped(self) -> bool:
-		return self.thread.stopped
-	@property
-	def expanded(self) -> bool:
-		return self._expanded
-	@property
-	def expandable(self) -> bool:
-		return self.thread.stopped
-
-	def toggle_expand(self) -> None:
-		if self._expanded:
-			self._expanded = False
-		else:
-			self._expanded = True
-			self._fetch_if_needed()
+		variables, self.next_start = page
+		self.variables.extend(variables)
 		self.on_updated()
 
-	def expand(self) -> None:
-		if not self._expanded:
-			self.toggle_expand()
-
-	def collapse(self) -> None:
-		if self._expanded:
-			self.toggle_expand()
-
-
-	def _fetch_if_needed(self, force_refetch: bool = False) -> None:
-		if (not self.fetched or force_refetch) and self.thread.stopped:
-			self.loading = True
-			core.run(self.thread.client.GetStackTrace(self.thread), self._on_fetched)
-
-	def _on_fetched(self, frames: List[StackFrame]) -> None:
-		self.fetched = True
-		self.loading = False
-		self.frames = frames
-		self.on_updated()
\ No newline at end of file
+# the number of stack frames fetched at a time, frames further down the stack are fetched when asked for
+STACK_FRAMES_PAGE_SIZE = 20
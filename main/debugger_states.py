@@ -0,0 +1,10 @@
+'''
+	the states of a DebuggerState, they are kept apart from debugger.py so the commands can check the state of a debugger without importing it see loader
+'''
+class DebuggerStates:
+	stopped = 0
+	paused = 1
+	running = 2
+
+	starting = 3
+	stopping = 4
@@ -0,0 +1,69 @@
+'''
+	the debugger (Main and everything it imports) is only loaded the first time a window needs one
+	plugin_loaded only imports the commands and event listeners sublime has to see so loading the plugin stays cheap when the debugger isn't used
+'''
+from sublime_db.core.typecheck import Optional, Any, TYPE_CHECKING
+
+import sublime
+import time
+
+from sublime_db import ui
+
+if TYPE_CHECKING:
+	from .main import Main
+	from .debugger import DebuggerState
+
+# the Main class once load has imported it
+_Main = None #type: Any
+
+def loaded() -> bool:
+	return not _Main is None
+
+def load() -> Any:
+	'''
+		imports Main and starts the ui the first time it is called, call this from the main loop
+	'''
+	global _Main
+	if _Main is None:
+		start_time = time.perf_counter()
+		from .main import Main
+		from .adapter_pool import AdapterPool
+		from .util import get_setting
+		from sublime_db.core import log
+
+		log.should_log_info = get_setting(None, 'log_info', False)
+
+		ui.startup()
+		ui.import_css('{}/{}'.format(sublime.packages_path(), 'sublime_db/main/components/components.css'))
+		AdapterPool.shared = AdapterPool()
+		_Main = Main
+		print('Debugger: loaded in {:.0f}ms'.format((time.perf_counter() - start_time) * 1000))
+	return _Main
+
+def main_for_window(window: sublime.Window, create: bool = False) -> 'Optional[Main]':
+	# nothing can have created a Main before the debugger is loaded
+	if _Main is None:
+		if not create:
+			return None
+		load()
+	return _Main.forWindow(window, create)
+
+def debugger_for_window(window: sublime.Window) -> 'Optional[DebuggerState]':
+	main = main_for_window(window)
+	if main:
+		return main.debugger
+	return None
+
+def unload() -> None:
+	global _Main
+	if _Main is None:
+		return
+
+	from .adapter_pool import AdapterPool
+	for key, instance in dict(_Main.instances).items():
+		instance.dispose()
+	_Main.instances = {}
+	if AdapterPool.shared:
+		AdapterPool.shared.dispose()
+	ui.shutdown()
+	_Main = None
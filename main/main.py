@@ -11,7 +11,7 @@ from .breakpoints import Breakpoints, Breakpoint, Filter
 
 from .util import get_setting, register_on_changed_setting, extract_variables
 from .configurations import Configuration, AdapterConfiguration, select_or_add_configuration
-from .config import PersistedData
+from .config import PersistedData, package_path
 
 from .components.variable_component import VariableComponent, Variable
 from .components.breakpoint_inline_component import BreakpointInlineComponent
@@ -20,6 +20,7 @@ from .components.callstack_panel import CallStackPanel
 from .components.console_panel import ConsolePanel
 from .components.variables_panel import VariablesPanel
 from .repl import run_repl_command
+from .sessions import Sessions
 
 from .debugger import (
 	DebuggerState,
@@ -50,6 +51,10 @@ class Main (DebuggerPanelCallbacks):
 			return main.debugger
 		return None
 	
+	@property
+	def debugger(self) -> DebuggerState:
+		return self.sessions.active
+
 	def create_input_handler(self, window: sublime.Window, label: str, text: str, on_change: Callable[[str], None],  on_done: Callable[[Optional[str]], None]) -> ui.InputHandler:
 		return PanelInputHandler(self.panel, label, text, on_change, on_done)
 
@@ -87,7 +92,8 @@ class Main (DebuggerPanelCallbacks):
 
 		def on_state_changed (state: int) -> None:
 			if state == DebuggerState.stopped:
-				self.breakpoints.clear_breakpoint_results()
+				if not self.sessions.running:
+					self.breakpoints.clear_breakpoint_results()
 				self.debugger_panel.setState(STOPPED)
 			elif state == DebuggerState.running:
 				self.debugger_panel.setState(RUNNING)
@@ -96,11 +102,11 @@ class Main (DebuggerPanelCallbacks):
 			elif state == DebuggerState.stopping or state == DebuggerState.starting:
 				self.debugger_panel.setState(LOADING)
 
-		def on_threads (threads: List[Thread]) -> None:
-			self.callstack_panel.update(self.debugger, threads)
+		def on_threads () -> None:
+			self.callstack_panel.update(self.sessions.sessions, self.sessions.active)
 
 		def on_scopes (scopes: List[Scope]) -> None:
-			self.variables_panel.set_scopes(scopes)
+			self.variables_panel.set_scopes(scopes, self.sessions.active.stopped_time)
 
 		def on_selected_frame(frame: Optional[StackFrame]) -> None:
 			self.callstack_panel.dirty_threads()
@@ -113,13 +119,13 @@ class Main (DebuggerPanelCallbacks):
 
 			core.run(self.navigate_to_frame(frame))
 
-		def on_output (event: OutputEvent) -> None:
+		def on_output (session: DebuggerState, event: OutputEvent) -> None:
 			category = event.category
 			msg = event.text
 			variablesReference = event.variablesReference
 
-			if variablesReference and self.debugger.adapter:
-				variable = Variable(self.debugger.adapter, msg, '', variablesReference)
+			if variablesReference and session.adapter:
+				variable = Variable(session.adapter, msg, '', variablesReference)
 				self.console_panel.AddVariable(variable)
 			elif category == "stdout":
 				self.console_panel.AddStdout(msg)
@@ -128,7 +134,7 @@ class Main (DebuggerPanelCallbacks):
 			elif category == "console":
 				self.console_panel.Add(msg)
 
-		self.debugger = DebuggerState(
+		self.sessions = Sessions(
 			on_state_changed = on_state_changed, 
 			on_threads = on_threads,
 			on_scopes = on_scopes,
@@ -177,6 +183,7 @@ class Main (DebuggerPanelCallbacks):
 
 		self.breakpoints.onRemovedBreakpoint.add(lambda b: self.clearBreakpointInformation())
 		self.breakpoints.onChangedBreakpoint.add(self.onChangedBreakpoint)
+		self.breakpoints.onMovedBreakpoints.add(self.onMovedBreakpoints)
 		self.breakpoints.onChangedFilter.add(self.onChangedFilter)
 		self.breakpoints.onSelectedBreakpoint.add(self.onSelectedBreakpoint)
 		
@@ -231,7 +238,7 @@ class Main (DebuggerPanelCallbacks):
 		self.panel.show()
 	
 	@core.async
-	def SelectConfiguration (self) -> core.awaitable[None]:
+	def SelectConfiguration (self) -> core.awaitable[Optional[Configuration]]:
 		selected_index = None #type: Optional[int]
 		if self.configuration:
 			selected_index = self.configuration.index
@@ -240,22 +247,27 @@ class Main (DebuggerPanelCallbacks):
 		print('Selected configuration:', configuration)
 		if configuration:
 			self.persistance.save_configuration_option(configuration)
+			self.persistance.save()
 			self.configuration = configuration
 			self.debugger_panel.set_name(configuration.name)
+		return configuration
 
+	# while other sessions are running the configuration is always selected and launched in a new session
 	@core.async
 	def LaunchDebugger (self) -> core.awaitable[None]:
-		self.console_panel.clear()
+		another_session = self.sessions.running
+		if not another_session:
+			self.console_panel.clear()
 		self.console_panel.Add('Starting debugger...')
 		try:
-			if not self.configuration:
-				yield from self.SelectConfiguration()
+			if not self.configuration or another_session:
+				configuration = yield from self.SelectConfiguration()
+			else:
+				configuration = self.configuration
 
-			if not self.configuration:
+			if not configuration:
 				return
 
-			configuration = self.configuration
-
 			adapter_configuration = self.adapters.get(configuration.type)
 			if not adapter_configuration:
 				raise Exception('Unable to find debug adapter with the type name "{}"'.format(configuration.type))
@@ -265,7 +277,18 @@ class Main (DebuggerPanelCallbacks):
 			core.display(e)
 			return
 		
-		yield from self.debugger.launch(adapter_configuration, configuration, self.breakpoints)
+		yield from self.sessions.launch(adapter_configuration, configuration, self.breakpoints)
+
+	@core.async
+	def dump_protocol_trace(self) -> core.awaitable[None]:
+		trace = self.debugger.trace
+		if not trace:
+			core.display('No protocol trace has been recorded. Enable the "trace_protocol" setting and start debugging.')
+			return
+
+		path = package_path('protocol_trace.json')
+		yield from core.main_loop.run_in_executor(core.main_executor, trace.dump, path)
+		yield from core.sublime_open_file_async(self.window, path)
 
 	def clearBreakpointInformation(self) -> None:
 		if self.breakpointInformation:
@@ -298,7 +321,7 @@ class Main (DebuggerPanelCallbacks):
 						event.view.erase_regions('selected_hover')
 					ui.Popup(VariableComponent(variable), event.view, word.a, on_close = on_close)
 					
-			core.run(self.debugger.adapter.Evaluate(expr, 'hover'), complete)
+			core.run(self.debugger.adapter.Evaluate(expr, self.debugger.frame, 'hover'), complete)
 
 	def on_gutter_hovered(self, event: ui.GutterEvent) -> None:
 		if not self.is_source_file(event.view): return
@@ -314,14 +337,14 @@ class Main (DebuggerPanelCallbacks):
 		self.breakpoints.select_breakpoint(breakpoint)
 
 	def dispose(self) -> None:
-		self.persistance.save_breakpoints(self.breakpoints)
-		self.persistance.save_to_file()
+		self.persistance.flush()
 
 		if self.selectedFrameComponent:
 			self.selectedFrameComponent.dispose()
 			self.selectedFrameComponent = None
 
 		self.clearBreakpointInformation()
+		self.sessions.dispose()
 
 		for d in self.disposeables:
 			d.dispose()
@@ -331,12 +354,15 @@ class Main (DebuggerPanelCallbacks):
 		del Main.instances[self.window.id()]
 	
 	def onChangedFilter(self, filter: Filter) -> None:
-		self.debugger.update_exception_filters(self.breakpoints.filters)
+		self.sessions.update_exception_filters()
 
 	def onChangedBreakpoint(self, breakpoint: Breakpoint) -> None:
-		file = breakpoint.file
-		breakpoints = self.breakpoints.breakpoints_for_file(file)
-		self.debugger.update_breakpoints_for_file(file, breakpoints)
+		self.sessions.update_breakpoints_for_file(breakpoint.file)
+		self.persistance.save(self.breakpoints)
+
+	def onMovedBreakpoints(self, file: str) -> None:
+		self.sessions.breakpoints_moved(file)
+		self.persistance.save(self.breakpoints)
 
 	def onSelectedBreakpoint(self, breakpoint: Optional[Breakpoint]) -> None:
 		if breakpoint:
@@ -350,7 +376,7 @@ class Main (DebuggerPanelCallbacks):
 		self.panel.show()
 		core.run(self.LaunchDebugger())
 	def OnStop(self) -> None:
-		core.run(self.debugger.stop())
+		self.sessions.stop_all()
 	def OnResume(self) -> None:
 		core.run(self.debugger.resume())
 	def OnPause(self) -> None:
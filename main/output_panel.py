@@ -4,7 +4,8 @@ from sublime_db.core.typecheck import (
 	Optional,
 	Dict, 
 	List,
-	Any
+	Any,
+	TYPE_CHECKING
 )
 
 import sublime
@@ -13,7 +14,7 @@ import sublime_plugin
 from sublime_db import core
 from sublime_db import ui
 
-from .debugger import CompletionItem
+if TYPE_CHECKING: from .debugger import CompletionItem
 
 _phantom_text = " \n\n\n\n\n\n\n"
 
@@ -0,0 +1,154 @@
+from sublime_db.core.typecheck import List, Optional, Callable
+
+from sublime_db import core
+
+from .breakpoints import Breakpoints
+from .configurations import Configuration, AdapterConfiguration
+from .debugger import (
+	DebuggerState,
+	OutputEvent,
+	StackFrame,
+	Scope,
+	Thread,
+)
+
+class Sessions:
+	'''
+		every debug session in a window, each session is a DebuggerState with its own adapter process and transport
+		so sessions do their io independently of each other and a slow adapter only holds up its own requests
+
+		one session is active, it is the one the ui commands (step, resume, repl, hover...) and the variables panel use
+		a session becomes active when it stops or when one of its threads or frames is selected
+		the call stack panel shows the threads of every session and breakpoint changes are sent to every session
+
+		there is always at least one session so the ui has something to show when nothing is running
+		other sessions are removed once they stop
+	'''
+	def __init__(self,
+		on_state_changed: Callable[[int], None],
+		on_threads: Callable[[], None],
+		on_scopes: Callable[[List[Scope]], None],
+		on_output: Callable[[DebuggerState, OutputEvent], None],
+		on_selected_frame: Callable[[Optional[StackFrame]], None]
+	) -> None:
+		self.on_state_changed = on_state_changed
+		self.on_threads = on_threads
+		self.on_scopes = on_scopes
+		self.on_output = on_output
+		self.on_selected_frame = on_selected_frame
+
+		self.sessions = [] #type: List[DebuggerState]
+		self.active = self.add()
+
+	def add(self) -> DebuggerState:
+		session = None #type: Optional[DebuggerState]
+
+		def on_state_changed(state: int) -> None:
+			assert session
+			self._on_state_changed(session, state)
+		def on_threads(threads: List[Thread]) -> None:
+			self.on_threads()
+		def on_scopes(scopes: List[Scope]) -> None:
+			assert session
+			self._on_scopes(session, scopes)
+		def on_output(event: OutputEvent) -> None:
+			assert session
+			self.on_output(session, event)
+		def on_selected_frame(frame: Optional[StackFrame]) -> None:
+			assert session
+			self._on_selected_frame(session, frame)
+
+		session = DebuggerState(
+			on_state_changed = on_state_changed,
+			on_threads = on_threads,
+			on_scopes = on_scopes,
+			on_output = on_output,
+			on_selected_frame = on_selected_frame)
+		self.sessions.append(session)
+		return session
+
+	@property
+	def running(self) -> bool:
+		for session in self.sessions:
+			if session.state != DebuggerState.stopped:
+				return True
+		return False
+
+	def set_active(self, session: DebuggerState) -> None:
+		if self.active == session:
+			return
+		self.active = session
+		self.on_state_changed(session.state)
+		self.on_scopes(session.scopes)
+		self.on_selected_frame(session.frame)
+		self.on_threads()
+
+	def _remove(self, session: DebuggerState) -> None:
+		self.sessions.remove(session)
+		session.dispose()
+		if self.active == session:
+			self.set_active(self.sessions[-1])
+		else:
+			self.on_threads()
+
+	# sessions that have been removed still call back while they are disposed
+	def _on_state_changed(self, session: DebuggerState, state: int) -> None:
+		if not session in self.sessions:
+			return
+		if state == DebuggerState.stopped and len(self.sessions) > 1:
+			self._remove(session)
+			return
+
+		if state == DebuggerState.paused and session != self.active:
+			self.set_active(session)
+		elif session == self.active:
+			self.on_state_changed(state)
+
+	def _on_scopes(self, session: DebuggerState, scopes: List[Scope]) -> None:
+		if session == self.active:
+			self.on_scopes(scopes)
+
+	def _on_selected_frame(self, session: DebuggerState, frame: Optional[StackFrame]) -> None:
+		if session == self.active:
+			self.on_selected_frame(frame)
+		elif (frame or session.thread) and session in self.sessions:
+			self.set_active(session)
+
+	def update_exception_filters(self) -> None:
+		for session in self.sessions:
+			session.update_exception_filters()
+
+	def update_breakpoints_for_file(self, file: str) -> None:
+		for session in self.sessions:
+			session.update_breakpoints_for_file(file)
+
+	def breakpoints_moved(self, file: str) -> None:
+		for session in self.sessions:
+			session.breakpoints_moved(file)
+
+	@core.async
+	def launch(self, adapter_configuration: AdapterConfiguration, configuration: Configuration, breakpoints: Breakpoints) -> core.awaitable[None]:
+		'''
+			launches in the active session if it is stopped otherwise in a new session alongside the others
+		'''
+		if self.active.state == DebuggerState.stopped:
+			session = self.active
+		else:
+			session = self.add()
+			self.set_active(session)
+		yield from session.launch(adapter_configuration, configuration, breakpoints)
+
+	def stop_all(self) -> None:
+		for session in list(self.sessions):
+			core.run(session.stop())
+
+	def dispose(self) -> None:
+		# disposing a session stops it which would remove it from self.sessions and update the ui while we are disposing them
+		sessions, self.sessions = self.sessions, []
+		for session in sessions:
+			session.on_state_changed = lambda state: None
+			session.on_threads = lambda threads: None
+			session.on_scopes = lambda scopes: None
+			session.on_output = lambda event: None
+			session.on_selected_frame = lambda frame: None
+			session.dispose()
@@ -1,3 +1,6 @@
+import time
+_import_start_time = time.perf_counter()
+
 from sublime_db.core.typecheck import Set
 
 import sublime
@@ -5,19 +8,19 @@ import sublime
 from sublime_db import ui
 from sublime_db import core
 
-# import all the commands so that sublime sees them
+# import all the commands and event listeners so that sublime sees them
+# the debugger itself is imported the first time a window opens it see main/loader.py
 from sublime_db.main.commands import *
-from sublime_db.main.main import *
 from sublime_db.ui import ViewEventsListener
 from sublime_db.main.util import get_setting
 from sublime_db.main.output_panel import *
+from sublime_db.main import loader
+
+_import_time = time.perf_counter() - _import_start_time
 
 @core.async
 def startup_main_thread() -> None:
 	print('Starting up')
-	ui.startup()
-	ui.import_css('{}/{}'.format(sublime.packages_path(), 'sublime_db/main/components/components.css'))
-	
 	was_opened_at_startup = set() #type: Set[int]
 	
 	def on_view_activated (view: sublime.View) -> None:
@@ -27,13 +30,15 @@ def startup_main_thread() -> None:
 		window = view.window()
 		if window and (not window.id() in was_opened_at_startup) and get_setting(view, 'open_at_startup', False):
 			was_opened_at_startup.add(window.id())
-			Main.forWindow(window, True)
+			loader.main_for_window(window, True)
 
 	ui.view_activated.add(on_view_activated)
 
 def startup() -> None:
+	start_time = time.perf_counter()
 	core.startup()
 	core.run(startup_main_thread())
+	print('Debugger: plugin loaded in {:.0f}ms ({:.0f}ms importing)'.format((_import_time + time.perf_counter() - start_time) * 1000, _import_time * 1000))
 
 import threading
 
@@ -43,10 +48,7 @@ def shutdown_main_thread(event: threading.Event) -> None:
 	# otherwise shutdown could lock us up
 	try:
 		print('shutdown')
-		for key, instance in dict(Main.instances).items():
-			instance.dispose()
-		Main.instances = {}
-		ui.shutdown()
+		loader.unload()
 	except Exception as e:
 		raise e
 	finally:
@@ -0,0 +1,122 @@
+'''
+	run with the UnitTesting package (UnitTesting: Test Current Package), the files used here are never open so no view is touched
+'''
+import unittest
+
+from sublime_db.main.breakpoints import Breakpoints, Breakpoint, BreakpointResult, FileBreakpoints
+
+FILE_A = '/sublime_db_tests/a.py'
+FILE_B = '/sublime_db_tests/b.py'
+
+def lines(breakpoints):
+	return [breakpoint.line for breakpoint in breakpoints]
+
+class TestFileBreakpoints(unittest.TestCase):
+	def test_sorted_by_line(self):
+		file = FileBreakpoints()
+		for line in (30, 10, 20, 5):
+			file.add(Breakpoint(FILE_A, line, True))
+		self.assertEqual(lines(file.breakpoints), [5, 10, 20, 30])
+		self.assertEqual(file.lines, [5, 10, 20, 30])
+
+	def test_same_line_keeps_the_order_they_were_added(self):
+		file = FileBreakpoints()
+		first = Breakpoint(FILE_A, 10, True)
+		second = Breakpoint(FILE_A, 10, True)
+		file.add(Breakpoint(FILE_A, 20, True))
+		file.add(first)
+		file.add(second)
+		self.assertEqual(file.breakpoints[:2], [first, second])
+		self.assertIs(file.get(10), first)
+
+		file.remove(first)
+		self.assertIs(file.get(10), second)
+		self.assertEqual(lines(file.breakpoints), [10, 20])
+
+	def test_remove(self):
+		file = FileBreakpoints()
+		breakpoint = Breakpoint(FILE_A, 10, True)
+		file.add(breakpoint)
+		file.add(Breakpoint(FILE_A, 20, True))
+		file.remove(breakpoint)
+		self.assertIsNone(file.get(10))
+		self.assertEqual(file.lines, [20])
+		with self.assertRaises(ValueError):
+			file.remove(breakpoint)
+
+	def test_resort_after_lines_move(self):
+		file = FileBreakpoints()
+		moved = Breakpoint(FILE_A, 10, True)
+		file.add(moved)
+		file.add(Breakpoint(FILE_A, 20, True))
+		file.add(Breakpoint(FILE_A, 30, True))
+
+		# what Breakpoints.sync does when editing a view moves a breakpoint
+		moved._line = 25
+		file.resort()
+		self.assertEqual(lines(file.breakpoints), [20, 25, 30])
+		self.assertIs(file.get(25), moved)
+		self.assertIsNone(file.get(10))
+
+class TestBreakpoints(unittest.TestCase):
+	def setUp(self):
+		self.breakpoints = Breakpoints()
+
+	def tearDown(self):
+		self.breakpoints.dispose()
+
+	def test_ordered_by_file_then_line(self):
+		self.breakpoints.add_breakpoint(FILE_B, 5)
+		self.breakpoints.add_breakpoint(FILE_A, 20)
+		self.breakpoints.add_breakpoint(FILE_A, 10)
+		self.assertEqual([(b.file, b.line) for b in self.breakpoints.breakpoints], [(FILE_A, 10), (FILE_A, 20), (FILE_B, 5)])
+		self.assertEqual(lines(self.breakpoints.breakpoints_for_file(FILE_A)), [10, 20])
+
+	def test_get_and_remove(self):
+		self.breakpoints.add_breakpoint(FILE_A, 10)
+		self.breakpoints.add_breakpoint(FILE_B, 10)
+		breakpoint = self.breakpoints.get_breakpoint(FILE_A, 10)
+		self.assertIsNotNone(breakpoint)
+		self.assertEqual(breakpoint.file, FILE_A)
+
+		self.breakpoints.remove_breakpoint(breakpoint)
+		self.assertIsNone(self.breakpoints.get_breakpoint(FILE_A, 10))
+		self.assertEqual(self.breakpoints.breakpoints_for_file(FILE_A), [])
+		# a file without breakpoints is dropped from the index
+		self.assertNotIn(FILE_A, self.breakpoints.files)
+		self.assertEqual([b.file for b in self.breakpoints.breakpoints], [FILE_B])
+
+	def test_two_on_the_same_line(self):
+		first = Breakpoint(FILE_A, 10, True)
+		second = Breakpoint(FILE_A, 10, True)
+		self.breakpoints.add(first)
+		self.breakpoints.add(second)
+		self.assertEqual(self.breakpoints.breakpoints, [first, second])
+
+		self.breakpoints.remove_breakpoint(first)
+		self.assertIs(self.breakpoints.get_breakpoint(FILE_A, 10), second)
+
+	def test_resort_after_lines_move(self):
+		for line in (10, 20, 30):
+			self.breakpoints.add_breakpoint(FILE_A, line)
+		moved = self.breakpoints.get_breakpoint(FILE_A, 30)
+
+		moved._line = 15
+		self.breakpoints.files[FILE_A].resort()
+		self.assertEqual(lines(self.breakpoints.breakpoints), [10, 15, 20])
+		self.assertIs(self.breakpoints.get_breakpoint(FILE_A, 15), moved)
+
+	def test_verified_if_any_session_verified_it(self):
+		self.breakpoints.add_breakpoint(FILE_A, 10)
+		breakpoint = self.breakpoints.get_breakpoint(FILE_A, 10)
+		self.assertTrue(breakpoint.verified)
+
+		self.breakpoints.set_breakpoint_result(breakpoint, BreakpointResult(False, 10, 'unsupported file'), 'first')
+		self.assertFalse(breakpoint.verified)
+		self.breakpoints.set_breakpoint_result(breakpoint, BreakpointResult(True, 10, None), 'second')
+		self.assertTrue(breakpoint.verified)
+
+		self.breakpoints.clear_breakpoint_results('second')
+		self.assertFalse(breakpoint.verified)
+		self.breakpoints.clear_breakpoint_results()
+		self.assertTrue(breakpoint.verified)
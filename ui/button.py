@@ -15,12 +15,21 @@ class OnClick (ComponentInline):
 		self.items = items
 		self.on_click = on_click
 		self.html_tag = 'a'
+		self.click_id = None #type: Optional[str]
 
 	def render (self) -> Sequence[Component]:
 		return self.items
-		
+
+	def removed(self) -> None:
+		if self.click_id and self.layout:
+			self.layout.unregister_on_click_handler(self.click_id)
+			self.click_id = None
+
 	def html(self, layout: Layout) -> str:
-		self.html_tag_extra = 'href = "{}"'.format(layout.register_on_click_handler(self.on_click))
+		# registered once so the id stays the same in html that was cached
+		if not self.click_id:
+			self.click_id = layout.register_on_click_handler(lambda: self.on_click())
+			self.html_tag_extra = 'href = "{}"'.format(self.click_id)
 		return super().html(layout)
 
 
@@ -46,6 +55,7 @@ class ButtonDoubleClick (OnClick):
 		self.is_double_click_timer = None #type: Optional[Timer]
 
 	def removed(self) -> None:
+		super().removed()
 		if self.is_double_click_timer:
 			self.is_double_click_timer.dispose()
 
@@ -4,9 +4,14 @@ from sublime_db.core.typecheck import (
 	List,
 	Optional,
 	Callable,
-	Sequence
+	Sequence,
+	Dict,
+	Set,
+	Any
 )
 
+import collections
+
 from .layout import Layout
 
 components = Sequence['Component']
@@ -20,6 +25,12 @@ class Component:
 		self.html_tag_extra = ''
 		self.requires_render = True
 		self.is_focus = False
+		# components rendered with the same key (and class) as the previous render keep that instance, see reconcile
+		self.key = None #type: Optional[Any]
+		# the component that rendered this one and the html from the last time this component was rendered
+		# the html is generated again only when this component or one of its descendants is dirty see render_html
+		self.parent = None #type: Optional[Component]
+		self.html_cache = None #type: Optional[str]
 	def added (self, layout: Layout) -> None:
 		pass
 	def removed(self) -> None:
@@ -32,33 +43,51 @@ class Component:
 	def render(self) -> components:
 		return []
 
+	def reuse(self, other: 'Component') -> bool:
+		'''
+			called when other is rendered where this component was, return True to keep this component and its subtree instead of other
+			by default only keyed components are kept since their key should describe everything they were created with
+			containers can take other's items and render them again to reconcile those
+		'''
+		return not self.key is None
+
 	def render_dirty(self, layout: Layout) -> None:
 		if self.requires_render:
 			self.requires_render = False
-			for item in self.render_items:
-				assert item.layout
-				item.layout.remove_component(item)
-
-			self.render_items = self.render()
-			for item in self.render_items:
-				layout.add_component(item)
+			self.invalidate_html()
+			self.render_items = reconcile(layout, self.render_items, self.render())
 
 		for item in self.render_items:
+			item.parent = self
 			item.render_dirty(layout)
 
+	def invalidate_html(self) -> None:
+		# a component's html includes the html of its descendants so its ancestors have to be generated again too
+		item = self #type: Optional[Component]
+		while item and not item.html_cache is None:
+			item.html_cache = None
+			item = item.parent
+
+	def render_html(self, layout: Layout) -> str:
+		if self.html_cache is None:
+			self.html_cache = self.html(layout)
+			layout.regenerated += 1
+		return self.html_cache
+
 	def add_class(self, name: str) -> None:
 		self.className += ' '
 		self.className += name
 
 	def dirty(self):
 		self.requires_render = True
+		self.invalidate_html()
 		if self.layout:
 			self.layout.dirty()
 		
 	def html_inner(self, layout: Layout) -> str:
 		html = []
 		for item in self.render_items:
-			html.append(item.html(layout))
+			html.append(item.render_html(layout))
 		return ''.join(html)
 
 	def html (self, layout: Layout) -> str:
@@ -72,3 +101,50 @@ class ComponentInline (Component):
 	def html (self, layout: Layout) -> str:
 		inner = self.html_inner(layout)
 		return '<{} class="{}" {}><img class="height">{}</{}>'.format(self.html_tag, self.className, self.html_tag_extra, inner, self.html_tag)
+
+def reconcile(layout: Layout, old_items: Sequence[Component], new_items: Sequence[Component]) -> Sequence[Component]:
+	'''
+		matches the newly rendered items with the previous ones and keeps the previous instance where it can (see Component.reuse)
+		items that are rendered again as the same instance are always kept
+		keyed items are matched by class and key, the others with the next previous item of the same class that has no key
+		returns the items to use, the previous items that are not kept are removed from the layout and the new ones added
+	'''
+	kept = set(id(item) for item in new_items) & set(id(item) for item in old_items) #type: Set[int]
+
+	keyed = {} #type: Dict[Tuple[type, Any], Component]
+	unkeyed = {} #type: Dict[type, collections.deque]
+	for item in old_items:
+		if id(item) in kept:
+			continue
+		if item.key is None:
+			unkeyed.setdefault(type(item), collections.deque()).append(item)
+		else:
+			keyed[(type(item), item.key)] = item
+
+	items = [] #type: List[Component]
+	added = [] #type: List[Component]
+	for item in new_items:
+		if id(item) in kept:
+			items.append(item)
+			continue
+		if item.key is None:
+			candidates = unkeyed.get(type(item))
+			old = candidates.popleft() if candidates else None
+		else:
+			old = keyed.pop((type(item), item.key), None)
+
+		if old and old.reuse(item):
+			kept.add(id(old))
+			items.append(old)
+		else:
+			added.append(item)
+			items.append(item)
+
+	for item in old_items:
+		if not id(item) in kept:
+			assert item.layout
+			item.layout.remove_component(item)
+	for item in added:
+		layout.add_component(item)
+
+	return items
@@ -26,11 +26,15 @@ class Image:
 
 	def __init__(self, file: str) -> None:
 		self.file = file
-		if file in Image.cached:
-			self.data = Image.cached[file]
-		else:
-			self.data = _b64_data_from_image_data(_image_to_data(file))
-			Image.cached[file] = self.data
+
+	# the image is only read from disk the first time it is drawn in html, the gutter only needs the file
+	@property
+	def data(self) -> str:
+		data = Image.cached.get(self.file)
+		if data is None:
+			data = _b64_data_from_image_data(_image_to_data(self.file))
+			Image.cached[self.file] = data
+		return data
 
 class Img (Component):
 	def __init__(self, image: Image) -> None:
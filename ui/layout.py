@@ -2,6 +2,10 @@ from sublime_db.core.typecheck import (
 	List,
 	Optional,
 	Callable,
+	Dict,
+	Tuple,
+	Set,
+	FrozenSet,
 	TYPE_CHECKING
 )
 
@@ -9,46 +13,124 @@ if TYPE_CHECKING: from .component import Component
 
 import sublime
 import os
+import re
 
 from sublime_db import core
 
-
-_all_css = ''
+# sublime puts one of these on the html element of every phantom and popup depending on the color scheme
+ALWAYS_USED_CLASSES = frozenset(['dark', 'light'])
+
+# every rule of the imported style sheets minified and without duplicates
+# each rule is its selectors with the classes they need and its declarations
+_css_rules = [] #type: List[Tuple[List[Tuple[str, FrozenSet[str]]], str]]
+_css_rules_seen = set() #type: Set[Tuple[str, str]]
+# the css for a set of used classes, layouts with the same classes share the same string
+_css_for_classes = {} #type: Dict[FrozenSet[str], str]
+
+_css_comment = re.compile(r'/\*.*?\*/', re.DOTALL)
+_css_whitespace = re.compile(r'\s+')
+_css_punctuation = re.compile(r'\s*([{};:,>])\s*')
+_css_rule = re.compile(r'([^{}]+)\{([^{}]*)\}')
+_css_class = re.compile(r'\.([\w-]+)')
+_html_class = re.compile(r'class="([^"]*)"')
+
+def minify_css(css: str) -> str:
+	css = _css_comment.sub('', css)
+	css = _css_whitespace.sub(' ', css)
+	css = _css_punctuation.sub(r'\1', css)
+	return css.replace(';}', '}').strip()
 
 def import_css(file: str):
+	'''
+		adds the rules of a style sheet to the ones layouts pick their css from, see css_for_classes
+		rules without declarations and rules that were already imported are dropped
+	'''
 	f = open(file, 'r')
-	global _all_css
-	_all_css += f.read()
+	css = minify_css(f.read())
 	f.close()
 
+	for selectors, declarations in _css_rule.findall(css):
+		if not declarations or (selectors, declarations) in _css_rules_seen:
+			continue
+		_css_rules_seen.add((selectors, declarations))
+		_css_rules.append(([(selector, frozenset(_css_class.findall(selector))) for selector in selectors.split(',')], declarations))
+
+	_css_for_classes.clear()
+
+def used_classes(html: str) -> FrozenSet[str]:
+	classes = set(ALWAYS_USED_CLASSES)
+	for names in _html_class.findall(html):
+		classes.update(names.split())
+	return frozenset(classes)
+
+def css_for_classes(classes: FrozenSet[str]) -> str:
+	'''
+		the imported rules that can match html using only these classes
+	'''
+	css = _css_for_classes.get(classes)
+	if css is None:
+		rules = [] #type: List[str]
+		for selectors, declarations in _css_rules:
+			used = [selector for selector, selector_classes in selectors if selector_classes <= classes]
+			if used:
+				rules.append('{}{{{}}}'.format(','.join(used), declarations))
+		css = ''.join(rules)
+		_css_for_classes[classes] = css
+	return css
+
 class Layout:
 	def __init__(self, item: 'Component') -> None:
 		assert item.layout == None, 'item is already added to a layout'
-		self.on_click_handlers = [] #type: List[Callable]
+		# click handlers are registered once per component and keep their id, html cached by components refers to them see Component.render_html
+		self.on_click_handlers = {} #type: Dict[int, Callable]
+		self.next_click_id = 0
+		# how many components had their html generated again by the last render
+		self.regenerated = 0
 		self.item = item
 		self.add_component(item)
 		self.focused = None #type: Optional['Component']
 		self.requires_render = True
-		self.css = _all_css
+		# only the css for the classes used in the html of this layout, see css_for_classes
+		self.css = ''
+		self.css_classes = None #type: Optional[FrozenSet[str]]
+		# called on the sublime thread once the next render has been handed to sublime, see on_next_paint
+		self.paint_callbacks = [] #type: List[Callable[[], None]]
 		
 	def dirty(self) -> None:
 		self.requires_render = True
 
+	def on_next_paint(self, callback: Callable[[], None]) -> None:
+		'''
+			calls callback on the sublime thread after the html of the next render that changed something has been handed to sublime
+		'''
+		self.paint_callbacks.append(callback)
+
+	def painted(self) -> None:
+		callbacks = self.paint_callbacks
+		self.paint_callbacks = []
+		for callback in callbacks:
+			callback()
+
 	def remove_component(self, item: 'Component') -> None:
 		if self.focused == item:
 			print('unfocusing removed item')
 			self.unfocus(item)
 			
-		for item in item.render_items:
-			self.remove_component(item)
+		for render_item in item.render_items:
+			self.remove_component(render_item)
 
 		item.removed()
 		item.layout = None
+		# the cached html can refer to click handlers of this layout
+		item.html_cache = None
 
 	def add_component(self, item: 'Component') -> None:
 		#assert not item.layout, 'This item already has a layout?'
 		item.layout = self
 		item.added(self)
+		# a component that was removed and rendered again keeps its render items, they were removed with it
+		for render_item in item.render_items:
+			self.add_component(render_item)
 
 	def focus(self, item: 'Component') -> None:
 		if self.focused == item: return #already focused
@@ -67,9 +149,13 @@ class Layout:
 		if not self.requires_render:
 			return False
 
-		self.on_click_handlers = [] #type: Callable[[], None]
+		self.regenerated = 0
 		self.item.render_dirty(self)
-		self.html = self.item.html(self)
+		self.html = self.item.render_html(self)
+		classes = used_classes(self.html)
+		if classes != self.css_classes:
+			self.css_classes = classes
+			self.css = css_for_classes(classes)
 		self.requires_render = False
 		return True
 
@@ -85,18 +171,22 @@ class Layout:
 		assert False, 'not implemented'
 	# internal functions
 	def on_navigate(self, path: str) -> None:
-		id = int(path)
-		try:
-			handler = self.on_click_handlers[id]
-		except:
-			assert False, 'You probably called register_on_click_handler outside html generation... TODO: this should be fixed.....'
-		
+		handler = self.on_click_handlers.get(int(path))
+		if not handler:
+			# the component was removed after sublime was given the html with this link
+			print('ignoring click on removed component {}'.format(path))
+			return
+
 		#ensure this gets dispatched on our main thread not sublime's
 		core.main_loop.call_soon_threadsafe(handler)
 	
 	def register_on_click_handler(self, callback: 'Callable') -> str:
-		id = len(self.on_click_handlers)
-		self.on_click_handlers.append(callback)
+		id = self.next_click_id
+		self.next_click_id += 1
+		self.on_click_handlers[id] = callback
 		return str(id)
 
+	def unregister_on_click_handler(self, id: str) -> None:
+		self.on_click_handlers.pop(int(id), None)
+
 
@@ -4,6 +4,7 @@ from sublime_db.core.typecheck import (
 	Optional,
 	Callable,
 	Set,
+	Any,
 	TYPE_CHECKING
 )
 
@@ -13,39 +14,132 @@ if TYPE_CHECKING: from .component import Component
 from .layout import Layout
 
 import sublime
+import time
+
+from sublime_db import core
 
 _timers = set() #type: Set[Timer]
 
+# timers and frames are only scheduled on the main loop while rendering is started (see ui.startup)
+# with nothing dirty and no timers running nothing wakes the main loop
+_rendering = False
+
 class Timer:
+	'''
+		calls callback every interval seconds from the time it is added until it is removed
+	'''
 	def __init__(self, interval: float, callback: Callable[[], None]) -> None:
 		self.interval = interval
-		self.current_time = 0.0
 		self.callback = callback
+		self.handle = None #type: Optional[Any]
+
+	def _schedule(self) -> None:
+		self.handle = core.main_loop.call_later(self.interval, self._fire)
+
+	def _fire(self) -> None:
+		self._schedule()
+		self.callback()
 
-	def update(self, delta: float) -> None:
-		self.current_time += delta
-		while self.current_time > self.interval:
-			self.callback()
-			self.current_time -= self.interval
+	def _cancel(self) -> None:
+		if self.handle:
+			self.handle.cancel()
+			self.handle = None
 
 	def dispose (self) -> None:
 		remove_timer(self)
 
 def add_timer (timer: Timer) -> None:
+	if timer in _timers:
+		return
 	_timers.add(timer)
+	if _rendering:
+		timer._schedule()
 
 def remove_timer (timer: Timer) -> None:
 	_timers.discard(timer)
+	timer._cancel()
+
+class RenderStats:
+	'''
+		latency is the time from the first dirty() of a frame until sublime has been handed its phantoms and popups
+		for a click that is the click to paint latency since clicks dirty the components they change
+
+		html_bytes is the size of the html handed to sublime and regenerated the number of components whose html was generated again (see Component.render_html)
+		updated counts phantoms and popups handed to sublime, skipped the ones that rendered but whose html was the same as what sublime already has
+	'''
+	def __init__(self) -> None:
+		self.reset()
+
+	def reset(self) -> None:
+		self.frames = 0
+		self.painted = 0
+		self.latency_total = 0.0
+		self.latency_max = 0.0
+		self.html_bytes = 0
+		self.regenerated = 0
+		self.updated = 0
+		self.skipped = 0
+
+	def __str__(self) -> str:
+		painted = max(self.painted, 1)
+		return '{} frames, {} painted ({} updated, {} skipped unchanged), dirty to paint {:.1f}ms average {:.1f}ms max, {:.0f} html bytes and {:.1f} components generated per paint'.format(
+			self.frames,
+			self.painted,
+			self.updated,
+			self.skipped,
+			self.latency_total / painted * 1000,
+			self.latency_max * 1000,
+			self.html_bytes / painted,
+			self.regenerated / painted
+		)
+
+render_stats = RenderStats()
+
+_render_scheduled = False
+_dirty_time = None #type: Optional[float]
+
+def schedule_render() -> None:
+	'''
+		requests a frame, every request before the frame runs is rendered by that same frame
+		this can be called from any thread
+	'''
+	global _render_scheduled, _dirty_time
+	if _dirty_time is None:
+		_dirty_time = time.perf_counter()
+	if _render_scheduled or not _rendering:
+		return
+	_render_scheduled = True
+	core.main_loop.call_soon_threadsafe(_on_render)
+
+def _on_render() -> None:
+	global _render_scheduled
+	_render_scheduled = False
+	if _rendering:
+		render()
+
+def start_rendering() -> None:
+	global _rendering
+	_rendering = True
+	for timer in _timers:
+		timer._schedule()
+	schedule_render()
 
-def update (delta: float) -> None:
+def stop_rendering() -> None:
+	global _rendering
+	_rendering = False
 	for timer in _timers:
-		timer.update(delta)
+		timer._cancel()
 
 _renderables = [] #type: List[Renderable]
 _renderables_remove = [] #type: List[Renderable]
 _renderables_add = [] #type: List[Renderable]
 
 def render () -> None:
+	global _dirty_time
+	dirty_time = _dirty_time
+	_dirty_time = None
+	render_stats.frames += 1
+
 	_renderables.extend(_renderables_add)
 	
 	renderables_to_update = [] #type: List[Renderable]
@@ -62,6 +156,9 @@ def render () -> None:
 	for r in _renderables:
 		if r.render():
 			renderables_to_update.append(r)
+			render_stats.updated += 1
+			render_stats.html_bytes += r.html_bytes
+			render_stats.regenerated += r.regenerated
 
 	if not renderables_to_update and not renderables_to_clear:
 		return
@@ -71,18 +168,40 @@ def render () -> None:
 	def on_sublime_thread() -> None:
 		for r in renderables_to_update:
 			r.render_sublime()
+			r.painted()
 		for r in renderables_to_clear:
 			r.clear_sublime()
 
+		render_stats.painted += 1
+		if not dirty_time is None:
+			latency = time.perf_counter() - dirty_time
+			render_stats.latency_total += latency
+			render_stats.latency_max = max(render_stats.latency_max, latency)
+
 	sublime.set_timeout(on_sublime_thread, 0)
 
 class Renderable:
+	# the html handed to sublime by the last render and its size
+	# render returns False when the html is the same as what sublime already has so sublime doesn't lay it out again
+	html_bytes = 0
+	html_last = None #type: Optional[str]
+
+	def html_changed(self, html: str) -> bool:
+		if html == self.html_last:
+			render_stats.skipped += 1
+			return False
+		self.html_last = html
+		self.html_bytes = len(html)
+		return True
+
 	def render(self) -> bool:
 		assert False
 	def render_sublime(self) -> None:
 		assert False
 	def clear_sublime(self) -> None:
 		assert False
+	def painted(self) -> None:
+		assert False
 
 class Phantom(Layout, Renderable):
 	id = 0
@@ -100,10 +219,17 @@ class Phantom(Layout, Renderable):
 		self.view.add_regions(self.region_id, [self.region], flags = sublime.DRAW_NO_FILL)
 
 		_renderables_add.append(self)
+		schedule_render()
+
+	def dirty(self) -> None:
+		super().dirty()
+		schedule_render()
 
 	def render(self) -> bool:
 		if super().render() or not self.cachedPhantom:
 			html = '''<body id="debug"><style>{}</style>{}</body>'''.format(self.css, self.html)
+			if not self.html_changed(html):
+				return False
 			# we use the region to track where we should place the new phantom so if text is inserted the phantom will be redrawn in the correct place
 			region = self.view.get_regions(self.region_id)[0]
 			self.cachedPhantom = sublime.Phantom(region, html, self.layout, self.on_navigate)
@@ -124,6 +250,7 @@ class Phantom(Layout, Renderable):
 	def dispose(self) -> None:
 		super().dispose()
 		_renderables_remove.append(self)
+		schedule_render()
 		self.view.erase_regions(self.region_id)
 
 class Popup(Layout, Renderable):
@@ -147,6 +274,10 @@ class Popup(Layout, Renderable):
 		_renderables_add.append(self)
 		self.is_hidden = False
 
+	def dirty(self) -> None:
+		super().dirty()
+		schedule_render()
+
 	def on_hide(self) -> None:
 		self.is_hidden = True
 		if self.on_close:
@@ -155,7 +286,7 @@ class Popup(Layout, Renderable):
 	def render(self) -> bool:
 		if super().render() or not self.html:
 			self.html = '''<body id="debug"><style>{}</style>{}</body>'''.format(self.css, self.html)
-			return True
+			return self.html_changed(self.html)
 		return False
 
 	def render_sublime(self) -> None:
@@ -173,5 +304,6 @@ class Popup(Layout, Renderable):
 	def dispose(self) -> None:
 		super().dispose()
 		_renderables_remove.append(self)
+		schedule_render()
 
 
@@ -4,6 +4,14 @@ from sublime_db.core.typecheck import (
 from .component import Component, ComponentInline
 from .layout import Layout
 
+# containers are kept and reconcile their new items with the ones they have like Table
+def reuse_items(component: Component, other: Component) -> bool:
+	assert type(component) == type(other)
+	component.items = other.items #type: ignore
+	component.className = other.className
+	component.requires_render = True
+	return True
+
 class Segment (Component):
 	def __init__(self, items: Sequence[Component]) -> None:
 		super().__init__()
@@ -12,6 +20,9 @@ class Segment (Component):
 	def render (self) -> Sequence[Component]:
 		return self.items
 
+	def reuse(self, other: Component) -> bool:
+		return reuse_items(self, other)
+
 class Box (ComponentInline):
 	def __init__(self, items: Sequence[Component]) -> None:
 		super().__init__()
@@ -20,12 +31,17 @@ class Box (ComponentInline):
 	def render (self) -> Sequence[Component]:
 		return self.items
 
+	def reuse(self, other: Component) -> bool:
+		return reuse_items(self, other)
+
 class Panel (Component):
 	def __init__(self, items: Sequence[Component]) -> None:
 		super().__init__()
 		self.items = items
 	def render (self) -> Sequence[Component]:
 		return self.items
+	def reuse(self, other: Component) -> bool:
+		return reuse_items(self, other)
 	def html (self, layout: Layout) -> str:
 		inner = self.html_inner(layout)
 		return '<{} class="{}" {}><img class="width">{}</{}>'.format(self.html_tag, self.className, self.html_tag_extra, inner, self.html_tag)
@@ -34,6 +50,12 @@ class HorizontalSpacer (Component):
 	def __init__(self, width: float) -> None:
 		super().__init__()
 		self.width = width
+	def reuse(self, other: Component) -> bool:
+		assert isinstance(other, HorizontalSpacer)
+		if self.width != other.width:
+			self.width = other.width
+			self.invalidate_html()
+		return True
 	def html (self, layout: Layout) -> str:
 		return '<{} class="{}" {}><img width="{}"></{}>'.format(self.html_tag, self.className, self.html_tag_extra, self.width, self.html_tag)
 
@@ -43,4 +65,7 @@ class Items (Component):
 		self.items = items
 
 	def render (self) -> Sequence[Component]:
-		return self.items
\ No newline at end of file
+		return self.items
+
+	def reuse(self, other: Component) -> bool:
+		return reuse_items(self, other)
@@ -13,6 +13,16 @@ class TableItem (Component):
 	def render (self) -> Sequence[Component]:
 		return self.items
 
+	def reuse(self, other: Component) -> bool:
+		assert isinstance(other, TableItem)
+		# rows that show the same instances don't need to be rendered (or their html generated) again
+		if self.className == other.className and len(self.items) == len(other.items) and all(a is b for a, b in zip(self.items, other.items)):
+			return True
+		self.items = other.items
+		self.className = other.className
+		self.requires_render = True
+		return True
+
 class Table (Component):
 	def __init__(self, items: Optional[Sequence[Component]] = None, table_items: Optional[Sequence[TableItem]] = None, selected_index = -1) -> None:
 		super().__init__()
@@ -21,10 +31,12 @@ class Table (Component):
 			assert table_items is None, 'expecting table_items to be None if items is set'
 			new_items = [] #type: List[TableItem]
 			for index, item in enumerate(items):
-				item = TableItem (items = [item])
+				table_item = TableItem (items = [item])
+				# rows are matched by what they show not by their position so inserting a row doesn't move every row after it into another TableItem
+				table_item.key = item if item.key is None else item.key
 				if selected_index == index:
-					item.add_class('selected')
-				new_items.append(item)
+					table_item.add_class('selected')
+				new_items.append(table_item)
 			self.items = new_items #type: Sequence[TableItem]
 		if not table_items is None:
 			assert items is None, 'expecting items to be None if table_items is set'
@@ -33,3 +45,12 @@ class Table (Component):
 	def render (self) -> Sequence[Component]:
 		return self.items
 
+	# the items are reconciled with the ones we already have so their rows (and anything keyed in them) are kept
+	def reuse(self, other: Component) -> bool:
+		assert isinstance(other, Table)
+		self.items = other.items
+		self.selected_index = other.selected_index
+		self.className = other.className
+		self.requires_render = True
+		return True
+